@@ -0,0 +1,101 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import Profile
+
+SEQUENCE_KEY = 'last_seen:seq'
+FLUSHED_KEY = 'last_seen:flushed'
+# Попыток занять номер в журнале, если он уже занят параллельной отметкой
+ENTRY_ATTEMPTS = 5
+# Время последней отметки в сессии: пока оно свежее, журнал в кэше не запрашивается
+SESSION_MARK_KEY = '_last_seen_at'
+
+
+def activity_cache():
+    return caches[settings.LAST_SEEN_CACHE]
+
+
+def last_seen_key(user_id):
+    return f'last_seen:{user_id}'
+
+
+def entry_key(number):
+    return f'last_seen:entry:{number}'
+
+
+def touch_last_seen(user_id):
+    """
+    Отметка активности пользователя не чаще раза в LAST_SEEN_INTERVAL секунд.
+    Отметка записывается не в базу, а в журнал в кэше (номер из счетчика -> запись),
+    его переносит в базу команда flush_last_seen. Возвращает True, если отметка записана.
+    Запись занимает номер через add: без атомарного incr (FileBasedCache) параллельные отметки
+    могут получить один номер, тогда берется следующий.
+    """
+    cache = activity_cache()
+    if not cache.add(f'last_seen:throttle:{user_id}', True, settings.LAST_SEEN_INTERVAL):
+        return False
+
+    now = timezone.now()
+    if cache.add(SEQUENCE_KEY, 0, None):
+        # Счетчик создан заново (первая отметка или вытеснение из кэша): журнал читается с начала
+        cache.set(FLUSHED_KEY, 0, None)
+    for _ in range(ENTRY_ATTEMPTS):
+        number = cache.incr(SEQUENCE_KEY)
+        if cache.add(entry_key(number), (user_id, now), settings.LAST_SEEN_BUFFER_TIMEOUT):
+            break
+    cache.set(last_seen_key(user_id), now, settings.LAST_SEEN_BUFFER_TIMEOUT)
+    return True
+
+
+def touch_session_last_seen(session, user_id):
+    """
+    Отметка активности владельца сессии. Время отметки запоминается в сессии,
+    и до истечения LAST_SEEN_INTERVAL запрос обходится без обращения к кэшу.
+    """
+    now = time.time()
+    if now - session.get(SESSION_MARK_KEY, 0) < settings.LAST_SEEN_INTERVAL:
+        return False
+    session[SESSION_MARK_KEY] = now
+    return touch_last_seen(user_id)
+
+
+def get_last_seen(profile):
+    """
+    Время последней активности: еще не перенесенное в базу из кэша или сохраненное в профиле
+    """
+    return activity_cache().get(last_seen_key(profile.user_id)) or profile.last_seen or profile.user.last_login
+
+
+def flush_last_seen(batch_size=None):
+    """
+    Перенос отметок активности из кэша в базу: Profile.last_seen обновляется одним UPDATE на пачку. Возвращает количество обновленных пользователей.
+    """
+    batch_size = batch_size or settings.LAST_SEEN_BATCH_SIZE
+    cache = activity_cache()
+    last_number = cache.get(SEQUENCE_KEY, 0)
+    number = cache.get(FLUSHED_KEY, 0)
+    if number > last_number:
+        # Счетчик сброшен (вытеснен из кэша) и нумерует отметки заново
+        number = 0
+    updated = 0
+    while number < last_number:
+        keys = [entry_key(item) for item in range(number + 1, min(number + batch_size, last_number) + 1)]
+        seen = {}
+        for user_id, moment in cache.get_many(keys).values():
+            seen[user_id] = max(moment, seen.get(user_id, moment))
+
+        if seen:
+            Profile.objects.filter(user_id__in=seen).update(last_seen=Case(
+                *[When(user_id=user_id, then=Value(moment)) for user_id, moment in seen.items()],
+                output_field=DateTimeField(),
+            ))
+
+        number += len(keys)
+        cache.set(FLUSHED_KEY, number, None)
+        cache.delete_many(keys)
+        updated += len(seen)
+    return updated
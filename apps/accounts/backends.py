@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend, загружающий пользователя запроса вместе с профилем одним запросом (select_related):
+    шапка сайта и проверки автора обращаются к request.user.profile без отдельного запроса
+    """
+
+    def get_user_queryset(self):
+        return UserModel._default_manager.select_related('profile')
+
+    def get_user(self, user_id):
+        try:
+            user = self.get_user_queryset().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await self.get_user_queryset().aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
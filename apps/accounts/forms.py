@@ -3,6 +3,8 @@ from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, Pass
 from django.contrib.auth.models import User
 from django.urls import reverse_lazy
 from .models import Profile
+from .geo import city_display_name
+from cities_light.models import City
 from django_countries.widgets import CountrySelectWidget
 from django_select2.forms import Select2Widget
 from datetime import timedelta
@@ -70,6 +72,27 @@ class ProfileUpdateForm(forms.ModelForm):
             'city': 'Город',
         }
 
+    def __init__(self, *args, **kwargs):
+        """
+        Варианты города ограничены выбранным (или отправленным) городом: список городов загружается
+        автодополнением, а не выводится в форме целиком
+        """
+        super().__init__(*args, **kwargs)
+        city_id = self.data.get(self.add_prefix('city')) if self.is_bound else self.instance.city_id
+        self.fields['city'].queryset = City.objects.select_related('country').filter(
+            pk=city_id if str(city_id or '').isdigit() else None)
+        self.fields['city'].label_from_instance = city_display_name
+
+    def clean(self):
+        """
+        Город должен относиться к выбранной стране
+        """
+        cleaned_data = super().clean()
+        city, country = cleaned_data.get('city'), cleaned_data.get('country')
+        if city is not None and country and city.country.code2 != country:
+            self.add_error('city', 'Выберите город из выбранной страны.')
+        return cleaned_data
+
     def clean_birth_date(self):
         """
         Валидация даты рождения (не должно быть будущих дат и возраст не более 90 лет)
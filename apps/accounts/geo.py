@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from cities_light.models import City
+from django_countries import countries
+
+from .models import GeoStat, Profile
+
+
+def city_display_name(city):
+    """
+    Название города так, как его показывает автодополнение: перевод или исходное название
+    """
+    return city.alternate_names or city.name
+
+
+def find_city_ids(locations):
+    """
+    Id городов по парам (код страны, название) одним запросом: название сравнивается с переводом
+    и с исходным названием (перенос текстовых названий, массовая загрузка пользователей).
+    Возвращает словарь {(код страны, название): id}, ненайденные пары отсутствуют.
+    """
+    locations = {(country, name) for country, name in locations if country and name}
+    if not locations:
+        return {}
+    names = {name for country, name in locations}
+    cities = (City.objects.filter(country__code2__in={country for country, name in locations})
+              .filter(Q(name__in=names) | Q(alternate_names__in=names)).order_by('pk')
+              .values_list('pk', 'country__code2', 'name', 'alternate_names'))
+    found = {}
+    for pk, country, *city_names in cities:
+        for name in city_names:
+            if (country, name) in locations:
+                found.setdefault((country, name), pk)
+    return found
+
+
+def geo_key_order(key):
+    """
+    Полный порядок мест проживания (город None - раньше любого id): строки GeoStat блокируются
+    всегда в одном порядке, и встречные переезды X -> Y и Y -> X не дают взаимной блокировки
+    """
+    country, city_id = key
+    return country, city_id is not None, city_id or 0
+
+
+def apply_geo_deltas(deltas):
+    """
+    Изменение счетчиков GeoStat: deltas - словарь {(код страны, id города): изменение}.
+    Недостающие строки создаются (ignore_conflicts на случай параллельного создания),
+    счетчики меняются через F(), без чтения текущих значений, в порядке geo_key_order.
+    """
+    deltas = sorted(((key, delta) for key, delta in deltas.items() if delta), key=lambda item: geo_key_order(item[0]))
+    if not deltas:
+        return
+    with transaction.atomic():
+        GeoStat.objects.bulk_create([GeoStat(country=country, city_id=city_id) for (country, city_id), delta in deltas],
+                                    ignore_conflicts=True)
+        for (country, city_id), delta in deltas:
+            GeoStat.objects.filter(country=country, city_id=city_id).update(users=F('users') + delta)
+
+
+def rebuild_geo_stats():
+    """
+    Полный пересчет GeoStat по профилям (после изменений в обход сигналов, например queryset.update).
+    Возвращает количество строк статистики.
+    """
+    counts = Counter()
+    for country, city, users in (Profile.objects.order_by().values('country', 'city')
+                                 .annotate(users=Count('pk')).values_list('country', 'city', 'users')):
+        counts[country or '', city] += users
+
+    with transaction.atomic():
+        GeoStat.objects.all().delete()
+        GeoStat.objects.bulk_create([GeoStat(country=country, city_id=city_id, users=users)
+                                     for (country, city_id), users in counts.items()])
+    return len(counts)
+
+
+def get_geo_summary():
+    """
+    Счетчики для боковой панели одним запросом к GeoStat: пользователи, города и страны
+    """
+    return GeoStat.objects.filter(users__gt=0).aggregate(
+        total_users=Sum('users', default=0),
+        cities=Count('city', distinct=True),
+        countries=Count('country', distinct=True, filter=~Q(country='')),
+    )
+
+
+def get_community_map():
+    """
+    Пользователи по странам с разбивкой по городам (по убыванию количества) для страницы сообщества.
+    Пользователи без указанной страны не выводятся.
+    """
+    by_country = defaultdict(lambda: {'users': 0, 'cities': []})
+    stats = (GeoStat.objects.filter(users__gt=0).exclude(country='').select_related('city')
+             .order_by('-users', 'city__name'))
+    for stat in stats:
+        entry = by_country[stat.country]
+        entry['users'] += stat.users
+        if stat.city is not None:
+            entry['cities'].append({'pk': stat.city_id, 'name': city_display_name(stat.city), 'users': stat.users})
+
+    return sorted(
+        ({'code': code, 'name': countries.name(code) or code, 'flag': f'flags/{code.lower()}.gif', **entry}
+         for code, entry in by_country.items()),
+        key=lambda entry: (-entry['users'], entry['name']),
+    )
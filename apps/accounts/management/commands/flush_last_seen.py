@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.activity import flush_last_seen
+
+
+class Command(BaseCommand):
+    """
+    Перенос отметок активности пользователей из кэша в базу.
+    Без --loop переносит накопленные отметки и завершается (для cron),
+    с --loop работает постоянно как воркер.
+    """
+    help = 'Пакетное обновление последней активности пользователей из буфера в кэше'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Отметок за один UPDATE')
+        parser.add_argument('--loop', action='store_true', help='Работать постоянно')
+        parser.add_argument('--interval', type=float, default=60, help='Пауза между переносами (секунды)')
+
+    def handle(self, *args, **options):
+        while True:
+            updated = flush_last_seen(options['batch_size'])
+            if updated:
+                self.stdout.write(f'Обновлена активность пользователей: {updated}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
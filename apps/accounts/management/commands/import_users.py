@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.accounts.utils import import_users
+
+
+class Command(BaseCommand):
+    """
+    Массовая загрузка пользователей с профилями из JSON-файла со списком объектов:
+        {"username": "player", "email": "player@example.com", "password": "pbkdf2_sha256$...",
+         "first_name": "Имя", "last_name": "Фамилия", "date_joined": "2024-01-01T12:00:00+03:00",
+         "bio": "О себе", "birth_date": "2000-01-31", "country": "RU", "city": "Москва"}
+    Обязательно только username. password - хэш пароля Django, без него пользователь
+    восстанавливает пароль через сброс по email.
+    """
+    help = 'Массовая загрузка пользователей и профилей через bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON-файл с пользователями')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as file:
+            items = json.load(file)
+
+        for item in items:
+            if not item.get('username'):
+                raise CommandError(f'У пользователя не указан username: {item}.')
+            if item.get('date_joined'):
+                item['date_joined'] = parse_datetime(item['date_joined'])
+            if item.get('birth_date'):
+                item['birth_date'] = parse_date(item['birth_date'])
+
+        try:
+            created = import_users(items, options['batch_size'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(f'Загружено пользователей: {len(created)}')
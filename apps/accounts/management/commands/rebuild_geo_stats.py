@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.geo import rebuild_geo_stats
+from apps.accounts.utils import bump_profiles_version
+
+
+class Command(BaseCommand):
+    """
+    Полный пересчет статистики пользователей по странам и городам (GeoStat) по профилям.
+    Нужен после изменения профилей в обход сигналов (queryset.update, загрузка через SQL).
+    """
+    help = 'Пересчет материализованной статистики пользователей по местам проживания'
+
+    def handle(self, *args, **options):
+        rows = rebuild_geo_stats()
+        bump_profiles_version()
+        self.stdout.write(f'Строк статистики: {rows}')
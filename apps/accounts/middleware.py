@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.utils.deprecation import MiddlewareMixin
+
+from .activity import touch_session_last_seen
+
+
+class LastSeenMiddleware(MiddlewareMixin):
+    """
+    Отметка активности авторизованных пользователей: не чаще раза в LAST_SEEN_INTERVAL,
+    через журнал в кэше без записи в базу на каждый запрос.
+    Id пользователя берется из сессии, чтобы не загружать пользователя, если представлению он не нужен
+    (асинхронные представления загружают его через request.auser()).
+    Время последней отметки хранится в сессии: пока оно свежее, кэш не запрашивается.
+    Служебные представления (track_last_seen = False) и запросы мимо представлений не отмечаются.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        request.tracks_last_seen = getattr(view_class, 'track_last_seen', True)
+
+    def process_response(self, request, response):
+        if not (getattr(request, 'tracks_last_seen', False)
+                and settings.SESSION_COOKIE_NAME in request.COOKIES
+                and hasattr(request, 'session')):
+            return response
+
+        user_id = request.session.get(SESSION_KEY)
+        if user_id is not None:
+            touch_session_last_seen(request.session, get_user_model()._meta.pk.to_python(user_id))
+        return response
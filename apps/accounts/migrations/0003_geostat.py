@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-19 13:00
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_geo_stats(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    GeoStat = apps.get_model('accounts', 'GeoStat')
+    counts = Counter()
+    for country, city, users in (Profile.objects.order_by().values('country', 'city')
+                                 .annotate(users=Count('pk')).values_list('country', 'city', 'users')):
+        counts[country or '', (city or '').strip()] += users
+    GeoStat.objects.bulk_create([GeoStat(country=country, city=city, users=users)
+                                 for (country, city), users in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_last_seen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeoStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(blank=True, max_length=2, verbose_name='Страна')),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Город')),
+                ('users', models.IntegerField(default=0, verbose_name='Пользователей')),
+            ],
+            options={
+                'verbose_name': 'Статистика по месту проживания',
+                'verbose_name_plural': 'Статистика по местам проживания',
+                'ordering': ('country', 'city'),
+                'constraints': [models.UniqueConstraint(fields=('country', 'city'), name='geostat_country_city_unique')],
+            },
+        ),
+        migrations.RunPython(fill_geo_stats, migrations.RunPython.noop),
+    ]
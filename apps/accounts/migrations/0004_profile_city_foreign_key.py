@@ -0,0 +1,88 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:00
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def resolve_cities(apps, schema_editor):
+    """
+    Перенос текстовых названий городов в ссылки на справочник: название, сохраненное автодополнением
+    (перевод или исходное название), ищется среди городов страны профиля. Ненайденные города очищаются.
+    """
+    Profile = apps.get_model('accounts', 'Profile')
+    City = apps.get_model('cities_light', 'City')
+    locations = set(Profile.objects.exclude(city_name__isnull=True).exclude(city_name='')
+                    .exclude(country__isnull=True).exclude(country='')
+                    .values_list('country', 'city_name').distinct())
+    for country, name in locations:
+        city_id = (City.objects.filter(country__code2=country).filter(Q(alternate_names=name) | Q(name=name))
+                   .order_by('pk').values_list('pk', flat=True).first())
+        if city_id is not None:
+            Profile.objects.filter(country=country, city_name=name).update(city=city_id)
+
+
+def fill_geo_stats(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    GeoStat = apps.get_model('accounts', 'GeoStat')
+    counts = Counter()
+    for country, city_id, users in (Profile.objects.order_by().values('country', 'city')
+                                    .annotate(users=Count('pk')).values_list('country', 'city', 'users')):
+        counts[country or '', city_id] += users
+    GeoStat.objects.all().delete()
+    GeoStat.objects.bulk_create([GeoStat(country=country, city_id=city_id, users=users)
+                                 for (country, city_id), users in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_geostat'),
+        ('cities_light', '0011_alter_city_country_alter_city_region_and_more'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='profile',
+            old_name='city',
+            new_name='city_name',
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                                    related_name='profiles', to='cities_light.city', verbose_name='Город'),
+        ),
+        migrations.RunPython(resolve_cities, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='city_name',
+        ),
+        migrations.RemoveConstraint(
+            model_name='geostat',
+            name='geostat_country_city_unique',
+        ),
+        migrations.RemoveField(
+            model_name='geostat',
+            name='city',
+        ),
+        migrations.AddField(
+            model_name='geostat',
+            name='city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE,
+                                    related_name='+', to='cities_light.city', verbose_name='Город'),
+        ),
+        migrations.AddConstraint(
+            model_name='geostat',
+            constraint=models.UniqueConstraint(condition=models.Q(('city__isnull', False)),
+                                               fields=('country', 'city'), name='geostat_country_city_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='geostat',
+            constraint=models.UniqueConstraint(condition=models.Q(('city__isnull', True)), fields=('country',),
+                                               name='geostat_country_unique'),
+        ),
+        migrations.RunPython(fill_geo_stats, migrations.RunPython.noop),
+    ]
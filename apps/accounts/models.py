@@ -17,7 +17,9 @@ class Profile(models.Model):
     bio = models.CharField(verbose_name='Информация о себе', max_length=500, blank=True, null=True)
     birth_date = models.DateField(verbose_name='Дата рождения', null=True, blank=True)
     country = CountryField(verbose_name='Страна', blank=True, null=True)
-    city = models.CharField(verbose_name='Город', max_length=100, blank=True, null=True)
+    city = models.ForeignKey('cities_light.City', verbose_name='Город', on_delete=models.SET_NULL, blank=True,
+                             null=True, related_name='profiles')
+    last_seen = models.DateTimeField(verbose_name='Последняя активность', null=True, blank=True, editable=False)
 
     class Meta:
         """
@@ -27,6 +29,22 @@ class Profile(models.Model):
         verbose_name = 'Профиль'
         verbose_name_plural = 'Профили'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминает загруженное местоположение, чтобы при сохранении изменить статистику GeoStat без запроса
+        """
+        instance = super().from_db(db, field_names, values)
+        if 'country' in field_names and 'city_id' in field_names:
+            instance._loaded_geo_key = instance.geo_key()
+        return instance
+
+    def geo_key(self):
+        """
+        Местоположение для статистики GeoStat: (код страны, id города), '' и None - не указано
+        """
+        return getattr(self.country, 'code', self.country) or '', self.city_id
+
     def save(self, *args, **kwargs):
         """
         Сохранение полей модели при их отсутствии заполнения
@@ -40,3 +58,29 @@ class Profile(models.Model):
         Возвращение строки
         """
         return self.user.username
+
+
+class GeoStat(models.Model):
+    """
+    Материализованная статистика пользователей по странам и городам: обновляется при сохранении
+    и удалении профиля, пересчитывается командой rebuild_geo_stats.
+    Пустая страна и город None - место не указано.
+    """
+    country = models.CharField(verbose_name='Страна', max_length=2, blank=True)
+    city = models.ForeignKey('cities_light.City', verbose_name='Город', on_delete=models.CASCADE, blank=True,
+                             null=True, related_name='+')
+    users = models.IntegerField(verbose_name='Пользователей', default=0)
+
+    class Meta:
+        ordering = ('country', 'city')
+        constraints = [
+            models.UniqueConstraint(fields=('country', 'city'), condition=models.Q(city__isnull=False),
+                                    name='geostat_country_city_unique'),
+            models.UniqueConstraint(fields=('country',), condition=models.Q(city__isnull=True),
+                                    name='geostat_country_unique'),
+        ]
+        verbose_name = 'Статистика по месту проживания'
+        verbose_name_plural = 'Статистика по местам проживания'
+
+    def __str__(self):
+        return f'{self.country or "-"} / {self.city_id or "-"}: {self.users}'
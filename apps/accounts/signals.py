@@ -1,10 +1,79 @@
-from django.db.models.signals import post_save
+import time
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from cities_light.models import City, Country
+from .activity import touch_last_seen, SESSION_MARK_KEY
+from .geo import apply_geo_deltas
 from .models import Profile
+from .utils import bump_profiles_version, clear_author_card, clear_country_cache
 
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+
+# Счетчики GeoStat меняются после фиксации транзакции: строка "место не указано" общая для всех
+# регистраций, и ее блокировка не должна держаться до конца транзакции регистрации
+@receiver(post_save, sender=Profile)
+def update_geo_stats(sender, instance, created, **kwargs):
+    new_key = instance.geo_key()
+    old_key = None if created else getattr(instance, '_loaded_geo_key', new_key)
+    if old_key != new_key:
+        deltas = {new_key: 1} if old_key is None else {old_key: -1, new_key: 1}
+        transaction.on_commit(partial(apply_geo_deltas, deltas))
+    instance._loaded_geo_key = new_key
+
+
+@receiver(post_delete, sender=Profile)
+def remove_geo_stats(sender, instance, **kwargs):
+    deltas = {getattr(instance, '_loaded_geo_key', instance.geo_key()): -1}
+    transaction.on_commit(partial(apply_geo_deltas, deltas))
+
+
+# При удалении города Profile.city обнуляется запросом UPDATE (SET_NULL) без сигналов профилей,
+# а строка города в GeoStat удаляется каскадно: его пользователи переносятся в "город не указан" страны
+@receiver(pre_delete, sender=City)
+def move_city_geo_stats(sender, instance, **kwargs):
+    deltas = {
+        (country or '', None): users
+        for country, users in (Profile.objects.filter(city=instance).order_by().values('country')
+                               .annotate(users=Count('pk')).values_list('country', 'users'))
+    }
+    if deltas:
+        transaction.on_commit(partial(apply_geo_deltas, deltas))
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def reset_country_cache(sender, **kwargs):
+    clear_country_cache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def reset_author_card(sender, instance, update_fields=None, **kwargs):
+    # Время входа (update_last_login) на карточках и страницах не выводится
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    clear_author_card(instance.pk if sender is User else instance.user_id)
+    # Версия для ETag меняется после фиксации, чтобы новая версия не досталась старым данным
+    transaction.on_commit(bump_profiles_version)
+
+
+# Время входа пишется при каждом входе (update_last_login Django): оно входит в хэш токенов
+# сброса пароля, и вход должен их аннулировать. Через журнал в кэше идет только отметка активности,
+# ее время запоминается в новой сессии, чтобы следующие запросы не отмечали активность повторно
+@receiver(user_logged_in)
+def record_login(sender, request, user, **kwargs):
+    touch_last_seen(user.pk)
+    if request is not None and hasattr(request, 'session'):
+        request.session[SESSION_MARK_KEY] = time.time()
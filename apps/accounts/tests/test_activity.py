@@ -0,0 +1,137 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.activity import (FLUSHED_KEY, SEQUENCE_KEY, SESSION_MARK_KEY, entry_key, flush_last_seen,
+                                    get_last_seen, last_seen_key, touch_last_seen)
+from apps.accounts.models import Profile
+from apps.accounts.tests.base import AccountsBaseTest, User
+
+
+@override_settings(LAST_SEEN_INTERVAL=300)
+class LastSeenTest(AccountsBaseTest):
+    """
+    Тесты отметок активности пользователей через журнал в кэше
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user(username='last_seen_user', password='password123')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_touch_is_throttled(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(touch_last_seen(self.user.pk))
+            self.assertFalse(touch_last_seen(self.user.pk))
+        self.assertTrue(touch_last_seen(self.other.pk))
+
+    def test_every_login_writes_last_login(self):
+        self.client.login(username='testuser_accounts', password='password123')
+        self.user.refresh_from_db()
+        first_login = self.user.last_login
+        self.assertIsNotNone(first_login)
+        self.client.login(username='testuser_accounts', password='password123')
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.last_login, first_login)
+
+    def test_login_invalidates_password_reset_token(self):
+        self.client.login(username='testuser_accounts', password='password123')
+        # Токен выдан вскоре после входа (хэш учитывает время входа с точностью до секунды)
+        User.objects.filter(pk=self.user.pk).update(last_login=timezone.now() - timedelta(seconds=5))
+        self.user.refresh_from_db()
+        token = default_token_generator.make_token(self.user)
+        self.client.login(username='testuser_accounts', password='password123')
+        self.user.refresh_from_db()
+        self.assertFalse(default_token_generator.check_token(self.user, token))
+
+    def test_login_marks_last_seen(self):
+        self.client.login(username='testuser_accounts', password='password123')
+        self.assertEqual(flush_last_seen(), 1)
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.last_seen)
+
+    def test_flush_updates_profiles_in_batches(self):
+        touch_last_seen(self.user.pk)
+        touch_last_seen(self.other.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_last_seen(batch_size=10), 2)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(Profile.objects.filter(last_seen__isnull=False).count(), 2)
+        # Перенесенные отметки из журнала удаляются
+        self.assertEqual(flush_last_seen(), 0)
+
+    def test_taken_number_is_skipped(self):
+        # Номер уже занят параллельной отметкой (неатомарный incr): запись получает следующий
+        cache.set(SEQUENCE_KEY, 0, None)
+        cache.set(entry_key(1), (self.other.pk, timezone.now()))
+        touch_last_seen(self.user.pk)
+        self.assertEqual(cache.get(entry_key(2))[0], self.user.pk)
+        self.assertEqual(flush_last_seen(), 2)
+
+    def test_reset_counter_is_not_skipped(self):
+        touch_last_seen(self.user.pk)
+        flush_last_seen()
+        # Счетчик вытеснен из кэша, номер перенесенных отметок остался
+        cache.delete(SEQUENCE_KEY)
+        touch_last_seen(self.other.pk)
+        self.assertEqual(flush_last_seen(), 1)
+
+        cache.set(FLUSHED_KEY, 10, None)
+        cache.delete(f'last_seen:throttle:{self.user.pk}')
+        touch_last_seen(self.user.pk)
+        self.assertEqual(flush_last_seen(), 1)
+
+    def test_request_marks_activity(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('accounts:profile_detail', kwargs={'slug': self.profile.slug}))
+        self.assertIsNotNone(get_last_seen(self.profile))
+        self.assertIsNone(Profile.objects.get(pk=self.profile.pk).last_seen)
+
+    def test_fresh_session_mark_skips_cache(self):
+        """Пока отметка в сессии свежая, журнал в кэше не трогается"""
+        self.client.force_login(self.user)
+        cache.clear()
+        self.client.get(reverse('accounts:profile_detail', kwargs={'slug': self.profile.slug}))
+        self.assertIsNone(cache.get(last_seen_key(self.user.pk)))
+
+    def test_service_requests_do_not_mark_activity(self):
+        """Служебные запросы (оценки ленты, автодополнение) активность не отмечают"""
+        self.client.force_login(self.user)
+        session = self.client.session
+        del session[SESSION_MARK_KEY]
+        session.save()
+        cache.clear()
+        self.client.get(reverse('blog:rating_batch'), {'ids': '1'})
+        self.client.get(reverse('accounts:city_autocomplete_ajax'), {'term': 'mo'})
+        self.assertIsNone(cache.get(last_seen_key(self.user.pk)))
+        self.assertNotIn(SESSION_MARK_KEY, self.client.session)
+
+    def test_stale_session_mark_touches_journal(self):
+        """После LAST_SEEN_INTERVAL запрос снова отмечает активность"""
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SESSION_MARK_KEY] -= 301
+        session.save()
+        cache.clear()
+        self.client.get(reverse('accounts:profile_detail', kwargs={'slug': self.profile.slug}))
+        self.assertIsNotNone(cache.get(last_seen_key(self.user.pk)))
+
+    def test_command(self):
+        touch_last_seen(self.user.pk)
+        out = StringIO()
+        call_command('flush_last_seen', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.last_seen)
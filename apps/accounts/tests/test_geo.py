@@ -0,0 +1,123 @@
+from cities_light.models import City, Country
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.forms import ProfileUpdateForm
+from apps.accounts.geo import (apply_geo_deltas, find_city_ids, get_community_map, get_geo_summary,
+                               rebuild_geo_stats)
+from apps.accounts.models import GeoStat, Profile
+from apps.accounts.tests.base import AccountsBaseTest, User
+from apps.accounts.utils import import_users
+
+
+class GeoStatTest(AccountsBaseTest):
+    """
+    Тесты материализованной статистики пользователей по местам проживания
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        russia = Country.objects.create(name='Russia', code2='RU', code3='RUS', continent='EU')
+        belarus = Country.objects.create(name='Belarus', code2='BY', code3='BLR', continent='EU')
+        cls.moscow = City.objects.create(name='Moscow', alternate_names='Москва', country=russia)
+        cls.kazan = City.objects.create(name='Kazan', alternate_names='Казань', country=russia)
+        cls.minsk = City.objects.create(name='Minsk', alternate_names='', country=belarus)
+        # Профили тестовых данных созданы внутри транзакции класса, их счетчики не применены
+        rebuild_geo_stats()
+
+    def stats(self):
+        return {(stat.country, stat.city_id): stat.users for stat in GeoStat.objects.filter(users__gt=0)}
+
+    def test_profile_changes_update_counters(self):
+        self.assertEqual(self.stats(), {('', None): 1})
+
+        profile = Profile.objects.get(pk=self.profile.pk)
+        profile.country, profile.city = 'RU', self.moscow
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+            other = User.objects.create_user(username='geo_user', password='password123')
+            other_profile = Profile.objects.get(user=other)
+            other_profile.country, other_profile.city = 'RU', self.kazan
+            other_profile.save()
+            # До фиксации транзакции счетчики не меняются
+            self.assertEqual(self.stats(), {('', None): 1})
+        self.assertEqual(self.stats(), {('RU', self.moscow.pk): 1, ('RU', self.kazan.pk): 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.stats(), {('RU', self.moscow.pk): 1})
+
+    def test_city_deletion_moves_users_to_unspecified_city(self):
+        profile = Profile.objects.get(pk=self.profile.pk)
+        profile.country, profile.city = 'RU', self.kazan
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self.stats(), {('RU', self.kazan.pk): 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kazan.delete()
+        self.assertEqual(self.stats(), {('RU', None): 1})
+        self.assertEqual(rebuild_geo_stats(), 1)
+        self.assertEqual(self.stats(), {('RU', None): 1})
+
+    def test_deltas_applied_in_fixed_order(self):
+        with CaptureQueriesContext(connection) as queries:
+            apply_geo_deltas({('RU', self.moscow.pk): -1, ('RU', None): 1, ('BY', self.minsk.pk): 1, ('', None): -1})
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 4)
+        self.assertIn("'BY'", updates[1])
+        self.assertIn('IS NULL', updates[2])
+        self.assertIn(str(self.moscow.pk), updates[3])
+
+    def test_unchanged_location_not_written(self):
+        profile = Profile.objects.get(pk=self.profile.pk)
+        profile.bio = 'Без изменения места'
+        with self.assertNumQueries(1):
+            profile.save()
+
+    def test_summary_and_map(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            import_users([
+                {'username': 'geo_1', 'country': 'RU', 'city': 'Москва'},
+                {'username': 'geo_2', 'country': 'RU', 'city': 'Moscow'},
+                {'username': 'geo_3', 'country': 'BY', 'city': 'Minsk'},
+                {'username': 'geo_4', 'country': 'BY', 'city': 'Москва'},
+            ])
+        with self.assertNumQueries(1):
+            summary = get_geo_summary()
+        self.assertEqual(summary, {'total_users': 5, 'cities': 2, 'countries': 2})
+
+        countries = get_community_map()
+        self.assertEqual([(country['code'], country['users']) for country in countries], [('BY', 2), ('RU', 2)])
+        self.assertEqual(countries[1]['cities'], [{'pk': self.moscow.pk, 'name': 'Москва', 'users': 2}])
+
+    def test_find_city_ids(self):
+        self.assertEqual(find_city_ids([('RU', 'Казань'), ('RU', 'Kazan'), ('RU', 'Minsk'), ('', 'Москва')]),
+                         {('RU', 'Казань'): self.kazan.pk, ('RU', 'Kazan'): self.kazan.pk})
+
+    def test_rebuild_after_queryset_update(self):
+        Profile.objects.filter(pk=self.profile.pk).update(country='BY', city=self.minsk)
+        self.assertEqual(rebuild_geo_stats(), 1)
+        self.assertEqual(self.stats(), {('BY', self.minsk.pk): 1})
+
+    def test_community_map_page(self):
+        Profile.objects.filter(pk=self.profile.pk).update(country='RU', city=self.kazan)
+        rebuild_geo_stats()
+        response = self.client.get(reverse('accounts:community_map'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Казань (1)')
+
+    def test_profile_form_city_choices(self):
+        self.profile.city = self.moscow
+        form = ProfileUpdateForm(instance=self.profile)
+        self.assertEqual(list(form.fields['city'].queryset), [self.moscow])
+
+        data = {'birth_date': '01.01.2000', 'country': 'BY', 'city': self.kazan.pk}
+        form = ProfileUpdateForm(data, instance=self.profile)
+        self.assertFalse(form.is_valid())
+        self.assertIn('city', form.errors)
+
+        data['city'] = self.minsk.pk
+        self.assertTrue(ProfileUpdateForm(data, instance=self.profile).is_valid())
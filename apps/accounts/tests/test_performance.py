@@ -0,0 +1,43 @@
+from django.urls import reverse
+from cities_light.models import City, Country
+
+from apps.accounts.models import Profile
+from apps.accounts.tests.base import AccountsBaseTest
+from apps.services.testing import PerformanceBudgetMixin, create_users
+
+
+class AccountsQueryBudgetTest(PerformanceBudgetMixin, AccountsBaseTest):
+    """
+    Бюджеты SQL-запросов и времени рендеринга страниц accounts
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.country = Country.objects.create(name='Russia', code2='RU', code3='RUS', continent='EU')
+        cities = City.objects.bulk_create([
+            City(name=f'Gorod {index}', alternate_names='', country=cls.country, slug=f'gorod-{index}')
+            for index in range(200)
+        ])
+        for index, user in enumerate(create_users('perf_profile', 50)):
+            Profile.objects.filter(user=user).update(city=cities[index % 10], country='RU')
+
+    def test_profile_detail_anonymous(self):
+        """Профиль для гостя укладывается в бюджет запросов и времени."""
+        # Статистика автора без кэша: агрегат и последние записи
+        with self.assertMaxQueries(7), self.assertMaxDuration():
+            response = self.client.get(reverse('accounts:profile_detail', kwargs={'slug': self.profile.slug}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_detail_authenticated(self):
+        """Профиль для пользователя укладывается в бюджет запросов и времени."""
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(9), self.assertMaxDuration():
+            response = self.client.get(reverse('accounts:profile_detail', kwargs={'slug': self.profile.slug}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_city_autocomplete(self):
+        """Автодополнение городов - один запрос городов и один страны."""
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse('accounts:city_autocomplete_ajax'), {'term': 'gorod', 'country_id': 'RU'})
+        self.assertEqual(len(response.json()['results']), 50)
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from cities_light.models import City, Country
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+
+from apps.accounts.models import GeoStat, Profile
+from apps.accounts.tests.base import AccountsBaseTest, User
+from apps.accounts.utils import author_card_key, get_author_card, get_author_cards, import_users
+
+
+class ProfileModelBackendTest(AccountsBaseTest):
+    """
+    Тесты бэкенда аутентификации, загружающего профиль вместе с пользователем
+    """
+
+    def test_profile_loaded_with_user(self):
+        self.client.force_login(self.user)
+        request = RequestFactory().get('/')
+        request.session = SessionStore(self.client.session.session_key)
+        with self.assertNumQueries(2):
+            user = get_user(request)
+            self.assertEqual(user.profile.slug, self.profile.slug)
+
+
+class AuthorCardsTest(AccountsBaseTest):
+    """
+    Тесты кэша карточек авторов комментариев
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user(username='author_card_user', password='password123')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cards_loaded_in_one_query_and_cached(self):
+        with self.assertNumQueries(1):
+            cards = get_author_cards([self.user.pk, self.other.pk, self.user.pk])
+        self.assertEqual(set(cards), {self.user.pk, self.other.pk})
+        self.assertEqual(cards[self.user.pk], {
+            'username': self.user.username, 'slug': self.profile.slug, 'avatar_url': None,
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(get_author_cards([self.user.pk, self.other.pk]), cards)
+
+    def test_card_reset_on_profile_and_user_change(self):
+        get_author_card(self.user.pk)
+        self.profile.bio = 'Новое описание'
+        self.profile.save()
+        self.assertIsNone(cache.get(author_card_key(self.user.pk)))
+
+        get_author_card(self.user.pk)
+        self.user.username = 'renamed_author'
+        self.user.save()
+        self.assertEqual(get_author_card(self.user.pk)['username'], 'renamed_author')
+
+    def test_missing_profile(self):
+        Profile.objects.filter(user=self.other).delete()
+        self.assertIsNone(get_author_card(self.other.pk))
+
+
+class ImportUsersTest(AccountsBaseTest):
+    """
+    Тесты массовой загрузки пользователей с профилями
+    """
+
+    def test_users_and_profiles_created_in_bulk(self):
+        country = Country.objects.create(name='Russia', code2='RU', code3='RUS', continent='EU')
+        city = City.objects.create(name='Moscow', alternate_names='Москва', country=country)
+        records = [{'username': f'imported_{index}', 'email': f'imported_{index}@example.com'} for index in range(30)]
+        records.append({'username': self.profile.slug, 'country': 'RU', 'city': 'Москва',
+                        'birth_date': date(2000, 1, 31)})
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            users = import_users(records, batch_size=100)
+        # Проверка логинов, пользователи, занятые SLUG, города и профили - по одному запросу на пачку,
+        # статистика GeoStat меняется после фиксации
+        self.assertEqual(len([query for query in queries if 'SAVEPOINT' not in query['sql']]), 5)
+
+        self.assertEqual(len(users), 31)
+        self.assertEqual(Profile.objects.filter(user__username__startswith='imported_').count(), 30)
+        profile = Profile.objects.get(user__username=self.profile.slug)
+        self.assertEqual((profile.country.code, profile.city_id, profile.birth_date), ('RU', city.pk, date(2000, 1, 31)))
+        # SLUG совпадает с занятым SLUG существующего профиля и получает суффикс
+        self.assertNotEqual(profile.slug, self.profile.slug)
+        self.assertTrue(profile.slug.startswith(f'{self.profile.slug}-'))
+        self.assertFalse(profile.user.has_usable_password())
+
+    def test_geo_stats_applied_once_after_commit(self):
+        records = [{'username': f'geo_batch_{index}', 'country': 'RU'} for index in range(25)]
+        with self.captureOnCommitCallbacks() as callbacks:
+            import_users(records, batch_size=10)
+        self.assertFalse(GeoStat.objects.filter(country='RU').exists())
+
+        # Изменения всех пачек суммируются: одна строка страны и один UPDATE
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(GeoStat.objects.get(country='RU', city=None).users, 25)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+
+    def test_duplicate_usernames_rejected(self):
+        with self.assertRaises(ValueError):
+            import_users([{'username': 'new_user'}, {'username': 'testuser_accounts'}])
+        with self.assertRaises(ValueError):
+            import_users([{'username': 'new_user'}, {'username': 'new_user'}])
+        self.assertFalse(User.objects.filter(username='new_user').exists())
+
+    def test_password_hashes_kept_and_plaintext_rejected(self):
+        users = import_users([{'username': 'hashed_user', 'password': make_password('secret123')}])
+        self.assertTrue(users[0].check_password('secret123'))
+        with self.assertRaises(ValueError) as error:
+            import_users([{'username': 'plain_user', 'password': 'secret123'}])
+        self.assertIn('plain_user', str(error.exception))
+        self.assertFalse(User.objects.filter(username='plain_user').exists())
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False) as file:
+            json.dump([{'username': 'json_user', 'date_joined': '2024-01-01T12:00:00+03:00'}], file)
+        self.addCleanup(os.remove, file.name)
+        out = StringIO()
+        call_command('import_users', file.name, stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertTrue(Profile.objects.filter(user__username='json_user').exists())
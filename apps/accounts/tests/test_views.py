@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.urls import reverse
+from cities_light.models import City, Country
+
+from apps.accounts.tests.base import AccountsBaseTest
+
+
+class CityAutocompleteAjaxViewTest(AccountsBaseTest):
+    """
+    Тесты автодополнения городов
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.country = Country.objects.create(name='Russia', code2='RU', code3='RUS', continent='EU')
+        cls.other_country = Country.objects.create(name='Belarus', code2='BY', code3='BLR', continent='EU')
+        cls.city = City.objects.create(name='Moscow', alternate_names='Москва', country=cls.country)
+        cls.other_city = City.objects.create(name='Minsk', alternate_names='', country=cls.other_country)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse('accounts:city_autocomplete_ajax')
+
+    def test_returns_cities_for_country(self):
+        """Проверяет, что возвращаются только города выбранной страны."""
+        response = self.client.get(self.url, {'term': 'M', 'country_id': 'RU'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [{'id': self.city.pk, 'text': 'Москва'}]})
+
+    def test_unknown_country_returns_empty_results(self):
+        """Проверяет, что для несуществующей страны возвращается пустой список."""
+        response = self.client.get(self.url, {'term': 'M', 'country_id': 'ZZ'})
+        self.assertEqual(response.json(), {'results': []})
+
+    def test_repeated_prefix_is_served_from_cache(self):
+        """Проверяет, что повторный запрос с тем же вводом не обращается к базе данных."""
+        self.client.get(self.url, {'term': 'Mo', 'country_id': 'RU'})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'term': '  mO ', 'country_id': 'ru'})
+        self.assertEqual(response.json()['results'][0]['text'], 'Москва')
+
+    def test_response_has_http_caching_headers(self):
+        """Проверяет наличие заголовков Cache-Control и ETag."""
+        response = self.client.get(self.url, {'term': 'Mo', 'country_id': 'RU'})
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_matching_etag_returns_not_modified(self):
+        """Проверяет, что при совпадении ETag возвращается 304."""
+        response = self.client.get(self.url, {'term': 'Mo', 'country_id': 'RU'})
+        response = self.client.get(self.url, {'term': 'Mo', 'country_id': 'RU'},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
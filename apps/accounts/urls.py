@@ -11,7 +11,8 @@ from .views import (ProfileUpdateView,
                     CustomChangePasswordView,
                     CustomPasswordResetView,
                     CustomPasswordResetConfirmView,
-                    CityAutocompleteAjaxView)
+                    CityAutocompleteAjaxView,
+                    CommunityMapView)
 
 app_name = 'accounts'
 
@@ -23,6 +24,7 @@ urlpatterns = [
     path('login/', UserLoginView.as_view(), name='login'),
     path('logout/', UserLogoutView.as_view(), name='logout'),
     path('city-autocomplete/', CityAutocompleteAjaxView.as_view(), name='city_autocomplete_ajax'),
+    path('community/', CommunityMapView.as_view(), name='community_map'),
 
     #   Восстановление пароля
     path('password-reset/', CustomPasswordResetView.as_view(), name='password_reset'),
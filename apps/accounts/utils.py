@@ -0,0 +1,186 @@
+from collections import Counter
+from functools import partial
+from uuid import uuid4
+
+from cities_light.models import Country
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from apps.services.utils import unique_slugify_many
+from .geo import apply_geo_deltas, find_city_ids
+from .models import Profile
+
+PROFILE_IMPORT_FIELDS = ('bio', 'birth_date', 'country')
+PROFILES_VERSION_KEY = 'profiles_version'
+
+_country_ids = {}
+
+
+def get_country_id(code2):
+    """
+    Возвращает id страны по двухбуквенному коду с кэшированием в памяти процесса.
+    Кэшируются только найденные страны, чтобы произвольные коды из запросов не раздували кэш.
+    """
+    if code2 in _country_ids:
+        return _country_ids[code2]
+
+    country_id = Country.objects.filter(code2=code2).values_list('pk', flat=True).first()
+    if country_id is not None:
+        _country_ids[code2] = country_id
+    return country_id
+
+
+def clear_country_cache():
+    """
+    Очистка кэша стран (вызывается при изменении справочника стран)
+    """
+    _country_ids.clear()
+
+
+async def aget_country_id(code2):
+    """
+    Асинхронная версия get_country_id
+    """
+    if code2 in _country_ids:
+        return _country_ids[code2]
+
+    country_id = await Country.objects.filter(code2=code2).values_list('pk', flat=True).afirst()
+    if country_id is not None:
+        _country_ids[code2] = country_id
+    return country_id
+
+
+def author_card_key(user_id):
+    return f'author_card:{user_id}'
+
+
+def build_author_card(profile):
+    """
+    Данные автора для вывода комментариев: имя, слаг профиля и адрес миниатюры аватара
+    (None - аватар по умолчанию, его адрес подставляется в шаблоне)
+    """
+    avatar_url = None
+    if profile.avatar:
+        try:
+            avatar_url = get_thumbnail(profile.avatar, '70x70', crop='center', quality=80).url
+        except OSError:
+            avatar_url = None
+    return {'username': profile.user.username, 'slug': profile.slug, 'avatar_url': avatar_url}
+
+
+def get_author_cards(user_ids):
+    """
+    Карточки авторов по id пользователей: одно обращение к кэшу на всех,
+    недостающие загружаются одним запросом и сохраняются в кэш
+    """
+    keys = {author_card_key(user_id): user_id for user_id in set(user_ids)}
+    cards = {keys[key]: card for key, card in cache.get_many(keys).items()}
+    missing = [user_id for user_id in keys.values() if user_id not in cards]
+    if missing:
+        loaded = {profile.user_id: build_author_card(profile)
+                  for profile in Profile.objects.filter(user_id__in=missing).select_related('user')}
+        cache.set_many({author_card_key(user_id): card for user_id, card in loaded.items()},
+                       settings.AUTHOR_CARD_CACHE_TIMEOUT)
+        cards.update(loaded)
+    return cards
+
+
+def get_author_card(user_id):
+    return get_author_cards([user_id]).get(user_id)
+
+
+def clear_author_card(user_id):
+    """
+    Сброс карточки автора (вызывается при изменении пользователя или профиля)
+    """
+    cache.delete(author_card_key(user_id))
+
+
+def get_profiles_version():
+    """
+    Версия данных пользователей, выводимых на страницах блога: карточки и аватары авторов,
+    счетчики пользователей по странам и городам. Учитывается в ETag условного GET
+    """
+    version = cache.get(PROFILES_VERSION_KEY)
+    if version is None:
+        cache.add(PROFILES_VERSION_KEY, uuid4().hex[:12], None)
+        version = cache.get(PROFILES_VERSION_KEY)
+    return version
+
+
+def bump_profiles_version():
+    """
+    Новая версия данных пользователей (после изменения профилей, пользователей и статистики GeoStat)
+    """
+    cache.set(PROFILES_VERSION_KEY, uuid4().hex[:12], None)
+
+
+def import_users(records, batch_size=1000):
+    """
+    Массовая загрузка пользователей вместе с профилями (перенос с других сайтов).
+
+    records - последовательность словарей с ключами:
+        username, email, password - хэш пароля в формате Django (без него пароль будет неиспользуемым),
+        first_name, last_name, date_joined, bio, birth_date, country,
+        city - название города страны country, ненайденный в справочнике город не заполняется
+        (все, кроме username, необязательны).
+
+    Пользователи и профили вставляются через bulk_create пачками по batch_size: сигнал post_save
+    (создание профиля по одному) не вызывается, профили создаются здесь же в той же транзакции,
+    а их SLUG рассчитываются в памяти по одному запросу занятых SLUG на пачку.
+    Изменения статистики GeoStat накапливаются по всем пачкам и применяются после фиксации
+    транзакции, одним изменением на место проживания.
+    Занятые или повторяющиеся логины и пароли, не являющиеся хэшем известного алгоритма
+    (например, пароль открытым текстом), - ошибка ValueError, в этом случае ничего не загружается.
+    Возвращает список созданных пользователей.
+    """
+    records = list(records)
+    usernames = [record['username'] for record in records]
+    duplicates = {username for username, count in Counter(usernames).items() if count > 1}
+    for start in range(0, len(usernames), batch_size):
+        duplicates.update(User.objects.filter(username__in=usernames[start:start + batch_size])
+                          .values_list('username', flat=True))
+    if duplicates:
+        raise ValueError(f'Логины уже заняты или повторяются: {", ".join(sorted(duplicates))}.')
+
+    invalid_passwords = []
+    for record in records:
+        if record.get('password'):
+            try:
+                identify_hasher(record['password'])
+            except ValueError:
+                invalid_passwords.append(record['username'])
+    if invalid_passwords:
+        raise ValueError(f'Пароль не является хэшем Django: {", ".join(invalid_passwords)}.')
+
+    unusable_password = make_password(None)
+    now = timezone.now()
+    created = []
+    geo_deltas = Counter()
+    with transaction.atomic():
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            users = User.objects.bulk_create([
+                User(username=record['username'], email=record.get('email', ''),
+                     password=record.get('password') or unusable_password,
+                     first_name=record.get('first_name', ''), last_name=record.get('last_name', ''),
+                     date_joined=record.get('date_joined') or now)
+                for record in batch
+            ])
+            slugs = unique_slugify_many(Profile, [user.username for user in users])
+            city_ids = find_city_ids((record.get('country'), record.get('city')) for record in batch)
+            profiles = Profile.objects.bulk_create([
+                Profile(user=user, slug=slug, city_id=city_ids.get((record.get('country'), record.get('city'))),
+                        **{field: record[field] for field in PROFILE_IMPORT_FIELDS if record.get(field)})
+                for user, slug, record in zip(users, slugs, batch)
+            ])
+            geo_deltas.update(profile.geo_key() for profile in profiles)
+            created.extend(users)
+        transaction.on_commit(partial(apply_geo_deltas, geo_deltas))
+        transaction.on_commit(bump_profiles_version)
+    return created
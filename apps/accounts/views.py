@@ -1,4 +1,8 @@
-from django.views.generic import DetailView, UpdateView, CreateView, View
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.views.generic import DetailView, UpdateView, CreateView, TemplateView, View
 from django.db import transaction
 from django.urls import reverse_lazy
 from django.contrib.messages.views import SuccessMessageMixin
@@ -6,23 +10,45 @@ from django.contrib.auth.views import LoginView, LogoutView, PasswordChangeView,
     PasswordResetConfirmView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
 from .models import Profile
 from .forms import UserUpdateForm, ProfileUpdateForm, UserRegisterForm, UserLoginForm, CustomPasswordResetForm
-from cities_light.models import City, Country
+from .activity import get_last_seen
+from .geo import city_display_name, get_community_map
+from .utils import aget_country_id
+from ..blog.utils import get_author_stats
+from ..services.mixins import ReadReplicaMixin
+from cities_light.models import City
 from django.db.models import Q
 
 
-class ProfileDetailView(DetailView):
+class ProfileDetailView(ReadReplicaMixin, DetailView):
     """
     Представление для просмотра профиля
     """
     model = Profile
     context_object_name = 'profile'
     template_name = 'accounts/profile_detail.html'
+    queryset = Profile.objects.select_related('user')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = f'Профиль пользователя: {self.object.user.username}'
+        context['last_seen'] = get_last_seen(self.object)
+        context['stats'] = get_author_stats(self.object.user_id)
+        return context
+
+
+class CommunityMapView(ReadReplicaMixin, TemplateView):
+    """
+    Представление карты сообщества: пользователи по странам и городам из статистики GeoStat
+    """
+    template_name = 'accounts/community_map.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Карта сообщества'
+        context['countries'] = get_community_map()
         return context
 
 
@@ -169,34 +195,48 @@ class CustomPasswordResetConfirmView(SuccessMessageMixin, PasswordResetConfirmVi
         return response
 
 
-class CityAutocompleteAjaxView(View):
-    def get(self, request, *args, **kwargs):
-        term = request.GET.get('term', '')
-        country_code = request.GET.get('country_id')
+class CityAutocompleteAjaxView(ReadReplicaMixin, View):
+    """
+    Автодополнение городов для Select2.
+    Возвращает id городов (Profile.city ссылается на справочник City).
+    Ответы кэшируются по паре (страна, нормализованный ввод) и отдаются с заголовками
+    Cache-Control и ETag, чтобы браузер и прокси могли переиспользовать результаты.
+    Представление асинхронное и не занимает поток воркера при работе под ASGI.
+    """
+    # Версия в префиксе: в кэше прошлой версии вместо id лежат названия городов
+    cache_prefix = 'city_autocomplete:v2'
+    track_last_seen = False
+
+    def get_cache_key(self, country_code, term):
+        term_hash = hashlib.md5(term.encode('utf-8')).hexdigest()
+        return f'{self.cache_prefix}:{country_code or "*"}:{term_hash}'
 
+    async def get_results(self, country_code, term):
         cities = City.objects.all()
 
         if country_code:
-            try:
-                country_obj = Country.objects.get(code2=country_code)
-                cities = cities.filter(country=country_obj)
-            except Country.DoesNotExist:
-                return JsonResponse({'results': []})
-            except Exception as e:
-                print(f"Ошибка при поиске страны: {e}")
-                return JsonResponse({'results': []})
+            country_id = await aget_country_id(country_code)
+            if country_id is None:
+                return []
+            cities = cities.filter(country_id=country_id)
 
         cities = cities.filter(
             Q(name__icontains=term) | Q(alternate_names__icontains=term)
-        ).select_related('country').order_by('name')
+        ).order_by('name').only('name', 'alternate_names')
+
+        return [{'id': city.pk, 'text': city_display_name(city)} async for city in cities[:50]]
 
-        results = []
-        for city in cities[:50]:
-            final_display_name = city.alternate_names if city.alternate_names else city.name
+    async def get(self, request, *args, **kwargs):
+        term = ' '.join(request.GET.get('term', '').split()).lower()
+        country_code = request.GET.get('country_id', '').strip().upper()
 
-            results.append({
-                'id': final_display_name,
-                'text': final_display_name
-            })
+        cache_key = self.get_cache_key(country_code, term)
+        results = await cache.aget(cache_key)
+        if results is None:
+            results = await self.get_results(country_code, term)
+            await cache.aset(cache_key, results, settings.CITY_AUTOCOMPLETE_CACHE_TIMEOUT)
 
-        return JsonResponse({'results': results})
+        response = JsonResponse({'results': results})
+        patch_cache_control(response, public=True, max_age=settings.CITY_AUTOCOMPLETE_CACHE_TIMEOUT)
+        set_response_etag(response)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
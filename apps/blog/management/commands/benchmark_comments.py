@@ -0,0 +1,66 @@
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.blog.models import Comment, Post
+from apps.blog.utils import import_comments
+from apps.services.dataset import build_comment_forest
+from apps.services.loadtest import percentile
+
+
+class Command(BaseCommand):
+    """
+    Замер задержки добавления комментариев в дерево заданного размера в текущем режиме хранения.
+    Сравнение режимов - два запуска:
+        COMMENTS_APPEND_ONLY=False python manage.py benchmark_comments --size 10000
+        COMMENTS_APPEND_ONLY=True python manage.py benchmark_comments --size 10000
+    Все данные создаются в транзакции, которая откатывается по завершении замера.
+    """
+    help = 'Бенчмарк вставки ответов и комментариев верхнего уровня в дерево MPTT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10000, help='Комментариев в записи перед замером')
+        parser.add_argument('--inserts', type=int, default=200, help='Вставок каждого вида')
+        parser.add_argument('--max-depth', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        mode = 'добавление в конец' if settings.COMMENTS_APPEND_ONLY else 'сортировка при вставке'
+        self.stdout.write(f'Режим: {mode}, комментариев в записи: {options["size"]}')
+
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark_{rng.getrandbits(32):x}')
+            post = Post.objects.create(title='Бенчмарк комментариев', description='-', text='-', author=user)
+            forest = build_comment_forest(options['size'], options['max_depth'], rng)
+            comments = import_comments(
+                {'key': index, 'post': post.pk, 'author': user.pk, 'content': '-', 'parent': node['parent']}
+                for index, node in enumerate(forest)
+            )
+            parent_ids = [comment.pk for comment in comments if comment.level < options['max_depth'] - 1]
+
+            self.measure('ответ', options['inserts'], lambda: Comment.objects.create(
+                post=post, author=user, content='-', parent=Comment.objects.get(pk=rng.choice(parent_ids))))
+            self.measure('верхний уровень', options['inserts'], lambda: Comment.objects.create(
+                post=post, author=user, content='-'))
+            transaction.set_rollback(True)
+
+    def measure(self, label, count, insert):
+        latencies = []
+        queries = 0
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                insert()
+                latencies.append(time.perf_counter() - started)
+            queries += len(context.captured_queries)
+        latencies.sort()
+        self.stdout.write(
+            f'{label}: p50 {percentile(latencies, 50) * 1000:.1f} мс, p95 {percentile(latencies, 95) * 1000:.1f} мс, '
+            f'запросов на вставку {queries / count:.1f}'
+        )
@@ -0,0 +1,53 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from apps.blog.models import Post
+from apps.blog.utils import import_comments
+
+
+class Command(BaseCommand):
+    """
+    Массовая загрузка комментариев из JSON-файла со списком объектов:
+        {"id": "f-1", "post": "slug-zapisi", "author": "username", "content": "Текст",
+         "parent": "f-0", "parent_pk": 15, "time_create": "2024-01-01T12:00:00+03:00"}
+    parent ссылается на id из того же файла, parent_pk - на существующий комментарий;
+    оба поля и time_create необязательны.
+    """
+    help = 'Массовая загрузка комментариев с перестроением только затронутых деревьев'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON-файл с комментариями')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as file:
+            items = json.load(file)
+
+        posts = dict(Post.objects.filter(slug__in={item['post'] for item in items}).values_list('slug', 'pk'))
+        authors = dict(User.objects.filter(username__in={item['author'] for item in items})
+                       .values_list('username', 'pk'))
+
+        records = []
+        for item in items:
+            if item['post'] not in posts:
+                raise CommandError(f'Запись {item["post"]} не найдена.')
+            if item['author'] not in authors:
+                raise CommandError(f'Пользователь {item["author"]} не найден.')
+            records.append({
+                'key': item['id'],
+                'post': posts[item['post']],
+                'author': authors[item['author']],
+                'content': item['content'],
+                'parent': item.get('parent'),
+                'parent_pk': item.get('parent_pk'),
+                'time_create': parse_datetime(item['time_create']) if item.get('time_create') else None,
+            })
+
+        try:
+            created = import_comments(records, options['batch_size'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(f'Загружено комментариев: {len(created)}')
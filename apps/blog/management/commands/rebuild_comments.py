@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.blog.models import Comment
+
+
+class Command(BaseCommand):
+    """
+    Перестроение деревьев комментариев по parent. Нужно после переключения COMMENTS_APPEND_ONLY
+    с True на False: деревья, накопленные в режиме добавления в конец, упорядочиваются по order_insertion_by.
+    С --post перестраиваются только деревья указанной записи.
+    """
+    help = 'Перестроение полей MPTT комментариев (после смены режима хранения или ручных правок)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, help='id записи, деревья которой нужно перестроить')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['post']:
+                tree_ids = set(Comment.objects.filter(post_id=options['post']).values_list('tree_id', flat=True))
+                for tree_id in sorted(tree_ids):
+                    Comment.objects.partial_rebuild(tree_id)
+                self.stdout.write(f'Перестроено деревьев: {len(tree_ids)}')
+            else:
+                Comment.objects.rebuild()
+                self.stdout.write('Все деревья комментариев перестроены')
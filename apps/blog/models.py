@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.core.validators import FileExtensionValidator
 from django.contrib.auth.models import User
 from mptt.fields import TreeForeignKey
@@ -9,13 +11,45 @@ from mptt.models import MPTTModel
 from apps.services.utils import unique_slugify
 
 
-class PostManager(models.Manager):
+class PostQuerySet(models.QuerySet):
+
+    def with_rating(self, user=None):
+        """
+        Добавляет сумму оценок (rating_sum) и, для авторизованного пользователя,
+        его оценку (user_vote) подзапросами, без отдельного запроса на каждую запись
+        """
+        rating_sum = Rating.objects.filter(post=OuterRef('pk')).values('post').annotate(
+            total=Sum('value')).values('total')
+        queryset = self.annotate(rating_sum=Coalesce(Subquery(rating_sum), 0))
+        if user is not None and user.is_authenticated:
+            user_vote = Rating.objects.filter(post=OuterRef('pk'), user=user).values('value')[:1]
+            queryset = queryset.annotate(user_vote=Subquery(user_vote))
+        return queryset
+
+    def with_versions(self):
+        """
+        Добавляет данные для валидаторов условного GET: количество и время последнего изменения
+        комментариев и оценок записи, а также последнего зарегистрированного пользователя,
+        от которого зависят счетчики боковой панели (категории учитываются версией их списка)
+        """
+        comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post')
+        ratings = Rating.objects.filter(post=OuterRef('pk')).order_by().values('post')
+        return self.annotate(
+            comments_count=Coalesce(Subquery(comments.annotate(total=Count('pk')).values('total')), 0),
+            comments_updated=Subquery(comments.annotate(last=Max('time_update')).values('last')),
+            rating_count=Coalesce(Subquery(ratings.annotate(total=Count('pk')).values('total')), 0),
+            rating_updated=Subquery(ratings.annotate(last=Max('time_create')).values('last')),
+            last_user_id=Subquery(User.objects.order_by('-pk').values('pk')[:1]),
+        )
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
     """
     Кастомный менеджер для модели постов
     """
 
     def get_queryset(self):
-        return super().get_queryset().select_related('author', 'category')
+        return super().get_queryset().select_related('author__profile', 'category')
 
     def published(self):
         return self.get_queryset().filter(status='published')
@@ -86,8 +120,13 @@ class Post(models.Model):
         super().save(*args, **kwargs)
 
     def get_sum_rating(self):
+        if hasattr(self, 'rating_sum'):
+            return self.rating_sum
         return self.rating.aggregate(total_rating=Sum('value'))['total_rating'] or 0
 
+    async def aget_sum_rating(self):
+        return (await self.rating.aaggregate(total_rating=Sum('value')))['total_rating'] or 0
+
 
 class Category(models.Model):
     """
@@ -143,9 +182,11 @@ class Comment(MPTTModel):
 
     class MPTTMeta:
         """
-        Сортировка по вложенности
+        Сортировка по вложенности. В режиме COMMENTS_APPEND_ONLY новые узлы добавляются в конец:
+        без сдвига tree_id всех деревьев при новом комментарии верхнего уровня
+        и без сдвига lft/rght соседних веток при ответе
         """
-        order_insertion_by = ('-time_create',)
+        order_insertion_by = () if settings.COMMENTS_APPEND_ONLY else ('-time_create',)
 
     class Meta:
         """
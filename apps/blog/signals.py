@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Comment, Post, Rating
+from .utils import bump_posts_version, clear_author_stats, clear_category_list
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def change_posts_version(sender, **kwargs):
+    # Версия для ETag меняется после фиксации, чтобы новая версия не досталась старым данным
+    transaction.on_commit(bump_posts_version)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_author_stats(sender, instance, **kwargs):
+    clear_author_stats(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_category_list(sender, **kwargs):
+    clear_category_list()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_comment_author_stats(sender, instance, **kwargs):
+    clear_author_stats(instance.author_id)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def reset_rated_author_stats(sender, instance, **kwargs):
+    # Запись уже загружена представлением оценок. Без нее (каскадное удаление) статистику
+    # сбросит сигнал удаления записи или истечение кэша, без запроса на каждую оценку
+    if Rating.post.is_cached(instance):
+        clear_author_stats(instance.post.author_id)
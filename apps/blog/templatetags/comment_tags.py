@@ -0,0 +1,51 @@
+from django import template
+from mptt.templatetags.mptt_tags import RecurseTreeNode
+from mptt.utils import get_cached_trees
+
+from apps.accounts.utils import get_author_card
+
+register = template.Library()
+
+
+def sort_newest_first(nodes):
+    """
+    Сортирует ветки от новых к старым на всех уровнях (узлы с кэшированными детьми из get_cached_trees)
+    """
+    nodes.sort(key=lambda node: node.time_create, reverse=True)
+    for node in nodes:
+        sort_newest_first(node._cached_children)
+    return nodes
+
+
+@register.simple_tag(takes_context=True)
+def author_card(context, user_id):
+    """
+    Карточка автора комментария: из author_cards контекста (загружены пачкой для всего дерева)
+    или из кэша карточек
+    """
+    cards = context.get('author_cards')
+    if cards is not None and user_id in cards:
+        return cards[user_id]
+    return get_author_card(user_id)
+
+
+class RecurseCommentsNode(RecurseTreeNode):
+
+    def render(self, context):
+        roots = sort_newest_first(get_cached_trees(self.queryset_var.resolve(context)))
+        return ''.join(self._render_node(context, node) for node in roots)
+
+
+@register.tag
+def recursecomments(parser, token):
+    """
+    Аналог recursetree для комментариев: порядок "сначала новые" задается при выводе,
+    поэтому не зависит от режима хранения дерева (COMMENTS_APPEND_ONLY)
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f'Тег {bits[0]} требует queryset комментариев')
+
+    template_nodes = parser.parse(('endrecursecomments',))
+    parser.delete_first_token()
+    return RecurseCommentsNode(template_nodes, template.Variable(bits[1]))
@@ -13,6 +13,10 @@ def get_user_rating_value(post, user):
     if not user.is_authenticated:
         return ''
 
+    # Оценка уже получена запросом списка (PostQuerySet.with_rating)
+    if hasattr(post, 'user_vote'):
+        return post.user_vote or ''
+
     try:
         rating = Rating.objects.get(post=post, user=user)
         return rating.value
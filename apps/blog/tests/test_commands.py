@@ -0,0 +1,29 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from apps.blog.models import Comment
+from apps.blog.tests.base import BlogViewsBaseTest
+
+
+class CommentCommandsTest(BlogViewsBaseTest):
+    """
+    Тесты команд обслуживания деревьев комментариев
+    """
+
+    def test_rebuild_comments_restores_tree(self):
+        """rebuild_comments восстанавливает испорченные поля MPTT записи."""
+        root = Comment.objects.create(post=self.published_post_1, author=self.user, content='Корень')
+        reply = Comment.objects.create(post=self.published_post_1, author=self.user, content='Ответ', parent=root)
+        Comment.objects.filter(pk=reply.pk).update(lft=10, rght=11, level=5)
+
+        call_command('rebuild_comments', post=self.published_post_1.pk, stdout=StringIO())
+        reply.refresh_from_db()
+        self.assertEqual((reply.lft, reply.rght, reply.level), (2, 3, 1))
+
+    def test_benchmark_comments_leaves_no_data(self):
+        """Бенчмарк выводит задержки и откатывает созданные данные."""
+        out = StringIO()
+        call_command('benchmark_comments', size=30, inserts=3, stdout=out)
+        self.assertIn('верхний уровень', out.getvalue())
+        self.assertFalse(Comment.objects.exists())
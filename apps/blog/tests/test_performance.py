@@ -0,0 +1,140 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.blog.models import Category, Comment, Post, Rating
+from apps.services.testing import PerformanceBudgetMixin, create_users
+
+
+class BlogPerformanceBaseTest(PerformanceBudgetMixin, TestCase):
+    """
+    Набор данных, приближенный к рабочему: сотни записей, оценки
+    от нескольких пользователей и вложенное дерево комментариев.
+    """
+    posts_count = 300
+    users_count = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users('perf_user', cls.users_count)
+        cls.user = cls.users[0]
+        cls.categories = [Category.objects.create(title=f'Категория {index}', slug=f'perf-category-{index}')
+                          for index in range(3)]
+        Post.objects.bulk_create([
+            Post(title=f'Запись {index}', slug=f'perf-post-{index}', description='Описание', text='Текст',
+                 author=cls.users[index % cls.users_count], category=cls.categories[index % 3])
+            for index in range(cls.posts_count)
+        ])
+        posts = list(Post.objects.order_by('pk'))
+        cls.post = posts[-1]
+        Rating.objects.bulk_create([
+            Rating(post=post, user=user, value=1 if (post.pk + user.pk) % 3 else -1)
+            for post in posts[-50:] for user in cls.users
+        ])
+
+        parents = [None]
+        for index in range(60):
+            comment = Comment.objects.create(post=cls.post, author=cls.users[index % cls.users_count],
+                                             content=f'Комментарий {index}', parent=parents[index // 3])
+            parents.append(comment)
+
+
+class BlogViewsQueryBudgetTest(BlogPerformanceBaseTest):
+    """
+    Бюджеты SQL-запросов и времени рендеринга страниц блога.
+    Для авторизованного пользователя добавляются запросы сессии, пользователя и профиля в шапке,
+    для ленты и страницы записи - запрос валидаторов условного GET.
+    """
+
+    def test_post_list_anonymous(self):
+        """Лента для гостя укладывается в бюджет запросов и времени."""
+        with self.assertMaxQueries(7), self.assertMaxDuration():
+            response = self.client.get(reverse('blog:home'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_list_authenticated(self):
+        """Вторая страница ленты для пользователя укладывается в бюджет."""
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(10), self.assertMaxDuration():
+            response = self.client.get(reverse('blog:home'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_with_comment_tree(self):
+        """Страница записи с деревом комментариев строится без N+1."""
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(10), self.assertMaxDuration():
+            response = self.client.get(reverse('blog:post_detail', kwargs={'slug': self.post.slug}))
+        self.assertContains(response, 'Комментарий 59')
+
+    def test_post_from_category(self):
+        """Лента категории укладывается в бюджет запросов и времени."""
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(11), self.assertMaxDuration():
+            response = self.client.get(reverse('blog:post_by_category', kwargs={'slug': self.categories[1].slug}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_post_list(self):
+        """Список записей пользователя укладывается в бюджет."""
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(9), self.assertMaxDuration():
+            response = self.client.get(reverse('blog:my_posts'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_search_without_query(self):
+        """Страница поиска без запроса укладывается в бюджет."""
+        # Поиск по сходству требует PostgreSQL (pg_trgm), поэтому проверяется пустой запрос
+        with self.assertMaxQueries(4), self.assertMaxDuration():
+            response = self.client.get(reverse('blog:post_search'))
+        self.assertEqual(response.status_code, 200)
+
+
+class BlogAjaxQueryBudgetTest(BlogPerformanceBaseTest):
+    """
+    Бюджеты SQL-запросов AJAX-эндпоинтов блога
+    """
+
+    def test_rating_create(self):
+        """Оценка записи через AJAX укладывается в бюджет запросов."""
+        self.client.force_login(self.users[1])
+        with self.assertMaxQueries(6):
+            response = self.client.post(reverse('blog:rating'), {'post_id': self.post.pk, 'value': 1},
+                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+
+    def test_rating_batch(self):
+        """Суммы и оценки пользователя для всей страницы ленты - один запрос данных (плюс сессия и пользователь)."""
+        self.client.force_login(self.users[1])
+        ids = ','.join(str(pk) for pk in Post.objects.values_list('pk', flat=True)[:50])
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('blog:rating_batch'), {'ids': ids})
+        self.assertEqual(len(response.json()['ratings']), 50)
+
+    def test_comment_reply(self):
+        """Ответ на комментарий через AJAX укладывается в бюджет запросов."""
+        self.client.force_login(self.user)
+        parent = Comment.objects.filter(post=self.post).last()
+        with self.assertMaxQueries(7):
+            response = self.client.post(reverse('blog:comment_create_view', kwargs={'pk': self.post.pk}),
+                                        {'content': 'Ответ', 'parent': parent.pk},
+                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Comment.objects.filter(parent=parent, content='Ответ').exists())
+
+    def test_comment_top_level(self):
+        """Комментарий верхнего уровня через AJAX укладывается в бюджет запросов."""
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(7):
+            response = self.client.post(reverse('blog:comment_create_view', kwargs={'pk': self.post.pk}),
+                                        {'content': 'Новый комментарий'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertIn('Новый комментарий', response.json()['comment_html'])
+
+    def test_comment_with_parent_from_another_post(self):
+        """Родитель из другой записи игнорируется, комментарий создается верхнего уровня."""
+        self.client.force_login(self.user)
+        other_post = Post.objects.exclude(pk=self.post.pk).first()
+        parent = Comment.objects.filter(post=self.post).first()
+        response = self.client.post(reverse('blog:comment_create_view', kwargs={'pk': other_post.pk}),
+                                    {'content': 'Чужой родитель', 'parent': parent.pk},
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        comment = Comment.objects.get(content='Чужой родитель')
+        self.assertEqual((comment.post_id, comment.parent_id), (other_post.pk, None))
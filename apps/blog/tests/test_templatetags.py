@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.template import Context, Template
+from django.utils import timezone
+
+from apps.blog.models import Comment
+from apps.blog.tests.base import BlogViewsBaseTest
+
+
+class RecurseCommentsTagTest(BlogViewsBaseTest):
+    """
+    Тесты тега recursecomments
+    """
+
+    def render(self):
+        template = Template(
+            '{% load comment_tags %}{% recursecomments comments %}[{{ node.content }}{{ children }}]{% endrecursecomments %}'
+        )
+        return template.render(Context({'comments': Comment.objects.filter(post=self.published_post_1)}))
+
+    def test_newest_first_regardless_of_tree_order(self):
+        """Ветки выводятся от новых к старым, даже если в дереве они хранятся в порядке добавления."""
+        first = Comment.objects.create(post=self.published_post_1, author=self.user, content='A')
+        second = Comment.objects.create(post=self.published_post_1, author=self.user, content='B')
+        reply_1 = Comment.objects.create(post=self.published_post_1, author=self.user, content='A1', parent=first)
+        reply_2 = Comment.objects.create(post=self.published_post_1, author=self.user, content='A2', parent=first)
+
+        now = timezone.now()
+        for minutes, comment in enumerate((first, reply_1, second, reply_2)):
+            Comment.objects.filter(pk=comment.pk).update(time_create=now + timedelta(minutes=minutes))
+
+        self.assertEqual(self.render(), '[B][A[A2][A1]]')
+
+    def test_empty_queryset(self):
+        """Без комментариев тег ничего не выводит."""
+        self.assertEqual(self.render(), '')
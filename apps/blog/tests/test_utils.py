@@ -0,0 +1,170 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.blog.models import Category, Comment, Post, Rating
+from apps.blog.tests.base import BlogViewsBaseTest
+from apps.blog.utils import author_stats_key, get_author_stats, get_category_list, import_comments
+
+
+class ImportCommentsTest(BlogViewsBaseTest):
+    """
+    Тесты массовой загрузки комментариев
+    """
+
+    def tree_fields(self):
+        return list(Comment.objects.order_by('pk').values_list('pk', 'tree_id', 'lft', 'rght', 'level', 'parent_id'))
+
+    def make_records(self, post, count, prefix='c'):
+        started = timezone.now() - timedelta(days=1)
+        return [
+            {'key': f'{prefix}{index}', 'post': post.pk, 'author': self.user.pk, 'content': f'Комментарий {index}',
+             'parent': f'{prefix}{(index - 1) // 2}' if index % 3 else None,
+             'time_create': started + timedelta(minutes=index)}
+            for index in range(count)
+        ]
+
+    def test_imported_trees_match_full_rebuild(self):
+        """Поля MPTT загруженных деревьев совпадают с результатом полного перестроения."""
+        Comment.objects.create(post=self.published_post_1, author=self.user, content='Существующий')
+        import_comments(self.make_records(self.published_post_1, 40))
+        imported = self.tree_fields()
+        Comment.objects.rebuild()
+        self.assertEqual(imported, self.tree_fields())
+
+    def test_original_time_is_kept(self):
+        """Время создания берется из загружаемых данных."""
+        records = self.make_records(self.published_post_1, 1)
+        comment = import_comments(records)[0]
+        comment.refresh_from_db()
+        self.assertEqual(comment.time_create, records[0]['time_create'])
+
+    def test_reply_to_existing_comment_rebuilds_only_its_tree(self):
+        """Ответ на существующий комментарий перестраивает только его дерево."""
+        target = Comment.objects.create(post=self.published_post_1, author=self.user, content='Корень')
+        other = Comment.objects.create(post=self.published_post_1, author=self.user, content='Другое дерево')
+        other_fields = Comment.objects.filter(pk=other.pk).values_list('tree_id', 'lft', 'rght').get()
+
+        import_comments([
+            {'key': 'a', 'post': self.published_post_1.pk, 'author': self.user.pk, 'content': 'Ответ',
+             'parent_pk': target.pk},
+            {'key': 'b', 'post': self.published_post_1.pk, 'author': self.user.pk, 'content': 'Ответ на ответ',
+             'parent': 'a'},
+        ])
+        target.refresh_from_db()
+        self.assertEqual(target.get_descendant_count(), 2)
+        self.assertEqual(Comment.objects.filter(pk=other.pk).values_list('tree_id', 'lft', 'rght').get(), other_fields)
+
+    def test_parent_from_another_post_is_rejected(self):
+        """Родитель должен относиться к той же записи."""
+        other_post = Post.objects.create(title='Другая', description='-', text='-', author=self.user)
+        foreign = Comment.objects.create(post=other_post, author=self.user, content='Чужой')
+        with self.assertRaises(ValueError):
+            import_comments([{'key': 'a', 'post': self.published_post_1.pk, 'author': self.user.pk,
+                              'content': 'Ответ', 'parent_pk': foreign.pk}])
+        self.assertFalse(Comment.objects.filter(post=self.published_post_1).exists())
+
+    def test_cyclic_parent_is_rejected(self):
+        """Циклическая ссылка на родителя - ошибка ValueError с указанием комментария."""
+        records = [{'key': key, 'post': self.published_post_1.pk, 'author': self.user.pk, 'content': key,
+                    'parent': parent} for key, parent in (('root', None), ('a', 'b'), ('b', 'a'))]
+        with self.assertRaisesMessage(ValueError, 'циклическая ссылка'):
+            import_comments(records)
+        self.assertFalse(Comment.objects.filter(post=self.published_post_1).exists())
+
+    def test_deep_branch_is_imported(self):
+        """Глубина ветки не ограничена лимитом рекурсии."""
+        records = [{'key': index, 'post': self.published_post_1.pk, 'author': self.user.pk, 'content': str(index),
+                    'parent': index - 1 if index else None} for index in range(1500)]
+        import_comments(records, batch_size=500)
+        self.assertEqual(Comment.objects.filter(post=self.published_post_1).order_by('-level')[0].level, 1499)
+
+    def test_query_count_does_not_depend_on_comment_count(self):
+        """Количество запросов зависит от глубины деревьев, но не от числа комментариев."""
+        query_counts = []
+        for count in (15, 60):
+            records = [
+                {'key': index, 'post': self.published_post_1.pk, 'author': self.user.pk, 'content': '-',
+                 'parent': index - index % 3 if index % 3 else None}
+                for index in range(count)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                import_comments(records, batch_size=500)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class AuthorStatsTest(BlogViewsBaseTest):
+    """
+    Тесты статистики автора для страницы профиля
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_counted_and_cached(self):
+        Comment.objects.create(post=self.published_post_1, author=self.user, content='Комментарий')
+        Rating.objects.create(post=self.published_post_1, user=self.user, value=1)
+        Rating.objects.create(post=self.draft_post_1, user=self.user, value=1)
+
+        with self.assertNumQueries(2):
+            stats = get_author_stats(self.user.pk)
+        self.assertEqual((stats['posts_count'], stats['rating_total'], stats['comments_count']), (1, 1, 1))
+        self.assertEqual([post['slug'] for post in stats['recent_posts']], [self.published_post_1.slug])
+        with self.assertNumQueries(0):
+            get_author_stats(self.user.pk)
+
+    def test_stats_reset_on_changes(self):
+        get_author_stats(self.user.pk)
+        Comment.objects.create(post=self.published_post_1, author=self.user, content='Комментарий')
+        self.assertIsNone(cache.get(author_stats_key(self.user.pk)))
+
+        get_author_stats(self.user.pk)
+        Rating.objects.create(post=self.published_post_1, user=self.user, value=-1)
+        self.assertEqual(get_author_stats(self.user.pk)['rating_total'], -1)
+
+        self.draft_post_1.status = 'published'
+        self.draft_post_1.save()
+        self.assertEqual(get_author_stats(self.user.pk)['posts_count'], 2)
+
+    def test_unknown_user(self):
+        self.assertIsNone(get_author_stats(0))
+
+
+class CategoryListTest(BlogViewsBaseTest):
+    """
+    Тесты кэшируемого списка категорий с количеством записей
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_in_one_query_and_cached(self):
+        empty = Category.objects.create(title='Пустая категория', slug='empty-category')
+        with self.assertNumQueries(1):
+            listing = get_category_list()
+        counts = {category['slug']: (category['posts_count'], category['latest_post'])
+                  for category in listing['categories']}
+        # Черновик не учитывается
+        self.assertEqual(counts[self.category.slug], (1, self.published_post_1.create))
+        self.assertEqual(counts[empty.slug], (0, None))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category_list(), listing)
+
+    def test_reset_on_post_and_category_changes(self):
+        version = get_category_list()['version']
+        self.draft_post_1.status = 'published'
+        self.draft_post_1.save()
+        listing = get_category_list()
+        self.assertNotEqual(listing['version'], version)
+        self.assertEqual(listing['categories'][0]['posts_count'], 2)
+
+        Category.objects.create(title='Новая категория', slug='new-category')
+        self.assertEqual(len(get_category_list()['categories']), 2)
+
+    def test_sidebar_shows_counts(self):
+        response = self.client.get('/')
+        self.assertContains(response, f'Последняя запись: {timezone.localtime(self.published_post_1.create):%d.%m.%Y}')
@@ -1,12 +1,29 @@
-from django.test import TestCase, Client, override_settings
+import asyncio
+import json
+import re
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied
+from django.contrib.auth.models import AnonymousUser
 from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.template.response import TemplateResponse
+from django.views.generic import TemplateView
 from ..models import Post, Category, Comment, Rating
 from ..forms import PostCreateForm, PostUpdateForm, CommentCreateForm, SearchForm
 from apps.blog.views import tr_handler403, tr_handler404, tr_handler500
 from apps.blog.tests.base import BlogViewsBaseTest
+from apps.accounts.models import Profile
+from apps.accounts.utils import import_users
+from apps.services.mixins import SharedPageCacheMixin
+from apps.services.pubsub import get_broker, post_channel, publish
 User = get_user_model()
 
 
@@ -625,6 +642,24 @@ class RatingCreateViewTest(BlogViewsBaseTest):
         self.assertEqual(Rating.objects.count(), initial_rating_count - 1)
         self.assertEqual(response.json()['rating_sum'], 0)
 
+    async def test_rating_via_async_client(self):
+        """Проверяет работу асинхронного представления через AsyncClient."""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(self.url, {'post_id': self.post.pk, 'value': -1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rating_sum'], -1)
+        self.assertTrue(await Rating.objects.filter(post=self.post, user=self.user, value=-1).aexists())
+
+    def test_invalid_value_returns_400(self):
+        """Проверяет, что отсутствующая или некорректная оценка дает ошибку 400, а не 500."""
+        self.client.login(username=self.user.username, password='password123')
+        for data in ({'post_id': self.post.pk}, {'post_id': self.post.pk, 'value': 'abc'},
+                     {'post_id': self.post.pk, 'value': 5}, {'post_id': 'abc', 'value': 1}):
+            response = self.client.post(self.url, data)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+        self.assertFalse(Rating.objects.filter(post=self.post, user=self.user).exists())
+
     def test_post_not_found_returns_404(self):
         """Проверяет, что если пост не найден, возвращается 404."""
         self.client.login(username=self.user.username, password='password123')
@@ -634,6 +669,335 @@ class RatingCreateViewTest(BlogViewsBaseTest):
         self.assertEqual(response.json(), {'error': 'Запись не найдена.'})
 
 
+class RatingBatchViewTest(BlogViewsBaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.__class__.published_post_1
+        self.other_user = User.objects.create_user(username='other_voter', password='password123')
+        Rating.objects.create(post=self.post, user=self.user, value=1)
+        Rating.objects.create(post=self.post, user=self.other_user, value=1)
+        self.url = reverse('blog:rating_batch')
+
+    def test_returns_sums_and_user_votes(self):
+        """Для авторизованного пользователя возвращаются суммы и его оценки."""
+        self.client.login(username=self.user.username, password='password123')
+        other_post = Post.objects.create(title='Another post', description='Описание', text='Текст',
+                                         author=self.user, category=self.category)
+        response = self.client.get(self.url, {'ids': f'{self.post.pk},{other_post.pk}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['ratings'], {
+            str(self.post.pk): {'rating_sum': 2, 'user_vote': 1},
+            str(other_post.pk): {'rating_sum': 0, 'user_vote': None},
+        })
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_anonymous_gets_only_sums(self):
+        """Гость получает только суммы оценок."""
+        response = self.client.get(self.url, {'ids': str(self.post.pk)})
+        self.assertEqual(response.json()['ratings'], {str(self.post.pk): {'rating_sum': 2, 'user_vote': None}})
+
+    def test_drafts_are_skipped(self):
+        """Черновики и несуществующие записи в ответ не попадают."""
+        response = self.client.get(self.url, {'ids': f'{self.draft_post_1.pk},99999'})
+        self.assertEqual(response.json()['ratings'], {})
+
+    def test_invalid_ids(self):
+        """Некорректный или слишком длинный список записей - ошибка 400."""
+        self.assertEqual(self.client.get(self.url, {'ids': '1,abc'}).status_code, 400)
+        ids = ','.join(str(pk) for pk in range(1, 102))
+        self.assertEqual(self.client.get(self.url, {'ids': ids}).status_code, 400)
+
+
+@override_settings(SSE_ENABLED=True, SSE_KEEPALIVE_SECONDS=5)
+class PostEventsViewTest(BlogViewsBaseTest):
+    """
+    Тесты потока server-sent events записи
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.__class__.published_post_1
+        self.url = reverse('blog:post_events', kwargs={'pk': self.post.pk})
+
+    async def read_event(self, stream):
+        return await asyncio.wait_for(anext(stream), 5)
+
+    async def test_stream_headers_and_retry(self):
+        """Поток отдается как text/event-stream и начинается с интервала переподключения."""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await self.read_event(stream), b'retry: 5000\n\n')
+        await stream.aclose()
+
+    async def test_published_message_is_streamed(self):
+        """Опубликованное в канал записи сообщение приходит клиенту событием."""
+        response = await self.async_client.get(self.url)
+        stream = aiter(response.streaming_content)
+        await self.read_event(stream)
+        publish(post_channel(self.post.pk), {'event': 'rating', 'post_id': self.post.pk, 'rating_sum': 3})
+        chunk = await self.read_event(stream)
+        self.assertTrue(chunk.startswith(b'event: rating\n'))
+        self.assertEqual(json.loads(chunk.decode().split('data: ', 1)[1]), {'post_id': self.post.pk, 'rating_sum': 3})
+        await stream.aclose()
+
+    @override_settings(SSE_KEEPALIVE_SECONDS=0.01)
+    async def test_keepalive_comment(self):
+        """Без событий клиенту периодически отправляется комментарий keepalive."""
+        response = await self.async_client.get(self.url)
+        stream = aiter(response.streaming_content)
+        await self.read_event(stream)
+        self.assertEqual(await self.read_event(stream), b': keepalive\n\n')
+        await stream.aclose()
+
+    def test_draft_post_returns_404(self):
+        """Для черновика и несуществующей записи поток не открывается."""
+        response = self.client.get(reverse('blog:post_events', kwargs={'pk': self.draft_post_1.pk}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('blog:post_events', kwargs={'pk': 99999}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(SSE_ENABLED=False)
+    def test_disabled_by_default(self):
+        """Без SSE_ENABLED поток не открывается, а страница записи не подключает его."""
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        response = self.client.get(reverse('blog:post_detail', kwargs={'slug': self.post.slug}))
+        self.assertNotContains(response, 'data-events-url')
+        self.assertNotContains(response, 'post_events.js')
+
+    def test_enabled_page_subscribes(self):
+        """С SSE_ENABLED страница записи получает адрес потока и скрипт подписки."""
+        response = self.client.get(reverse('blog:post_detail', kwargs={'slug': self.post.slug}))
+        self.assertContains(response, f'data-events-url="{self.url}"')
+        self.assertContains(response, 'post_events.js')
+
+    async def test_rating_and_comment_are_published(self):
+        """Оценка и новый комментарий публикуются в канал записи."""
+        subscription = get_broker().subscribe(post_channel(self.post.pk))
+        try:
+            await self.async_client.aforce_login(self.user)
+            await self.async_client.post(reverse('blog:rating'), {'post_id': self.post.pk, 'value': 1})
+            message = await asyncio.wait_for(subscription.get(), 5)
+            self.assertEqual(message, {'event': 'rating', 'post_id': self.post.pk, 'rating_sum': 1})
+
+            await self.async_client.post(reverse('blog:comment_create_view', kwargs={'pk': self.post.pk}),
+                                         {'content': 'Комментарий в реальном времени', 'parent': ''})
+            message = await asyncio.wait_for(subscription.get(), 5)
+            comment = await Comment.objects.filter(post=self.post).alatest('time_create')
+            self.assertEqual(message['event'], 'comment')
+            self.assertEqual(message['id'], comment.pk)
+            self.assertIsNone(message['parent_id'])
+            self.assertIn('Комментарий в реальном времени', message['html'])
+        finally:
+            subscription.close()
+
+
+class ConditionalGetTest(BlogViewsBaseTest):
+    """
+    Тесты условного GET (ETag) ленты и страницы записи
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.__class__.published_post_1
+        self.detail_url = reverse('blog:post_detail', kwargs={'slug': self.post.slug})
+
+    def test_detail_returns_304_for_matching_etag(self):
+        """Повторный запрос с тем же ETag получает 304 одним запросом к базе данных."""
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_is_not_shared_between_users(self):
+        """If-Modified-Since без ETag другого пользователя не дает 304: проверка идет только по ETag."""
+        response = self.client.get(self.detail_url)
+        self.client.login(username=self.user.username, password='password123')
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_etag_changes_with_comments_and_ratings(self):
+        """Новый комментарий, оценка и ее изменение дают новую версию страницы."""
+        etags = {self.client.get(self.detail_url)['ETag']}
+        Comment.objects.create(post=self.post, author=self.user, content='Новый комментарий')
+        etags.add(self.client.get(self.detail_url)['ETag'])
+        rating = Rating.objects.create(post=self.post, user=self.user, value=1)
+        etags.add(self.client.get(self.detail_url)['ETag'])
+        rating.value = -1
+        rating.save()
+        etags.add(self.client.get(self.detail_url)['ETag'])
+        self.assertEqual(len(etags), 4)
+
+    def test_detail_etag_changes_with_profiles_and_geo_stats(self):
+        """Изменение профиля автора и загрузка пользователей (счетчики GeoStat) дают новую версию страницы."""
+        etags = {self.client.get(self.detail_url)['ETag']}
+        profile = Profile.objects.get(user=self.user)
+        profile.bio = 'Новое описание автора'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        etags.add(self.client.get(self.detail_url)['ETag'])
+        with self.captureOnCommitCallbacks(execute=True):
+            import_users([{'username': 'etag_user', 'country': 'RU'}])
+        etags.add(self.client.get(self.detail_url)['ETag'])
+        self.assertEqual(len(etags), 3)
+
+    def test_etag_depends_on_user(self):
+        """Страница содержит персональные данные, поэтому ETag у гостя и пользователя разный."""
+        anonymous_etag = self.client.get(self.detail_url)['ETag']
+        self.client.login(username=self.user.username, password='password123')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=anonymous_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], anonymous_etag)
+
+    def test_list_etag_changes_with_new_post(self):
+        """Новая запись в ленте или категории меняет версию страницы."""
+        urls = (reverse('blog:home'), reverse('blog:post_by_category', kwargs={'slug': self.category.slug}))
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Post.objects.create(title='Новая запись', description='Описание', text='Текст', author=self.user,
+                            category=self.category)
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_changes_with_comments_and_ratings(self):
+        """Комментарий и оценка меняют версию ленты через версию данных в кэше."""
+        url = reverse('blog:home')
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, content='Комментарий в ленте')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(post=self.post, user=self.user, value=1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_validator_is_one_aggregate(self):
+        """Проверка ленты - один агрегатный запрос без выборки строк страницы."""
+        etag = self.client.get(reverse('blog:home'), {'page': 1})['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:home'), {'page': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OVER', queries[0]['sql'])
+        self.assertNotIn('LIMIT', queries[0]['sql'])
+
+    def test_missing_pages_are_not_validated(self):
+        """Для несуществующих страниц ленты и записей проверка пропускается и возвращается 404."""
+        self.assertEqual(self.client.get(reverse('blog:home'), {'page': 50}).status_code, 404)
+        response = self.client.get(reverse('blog:post_detail', kwargs={'slug': self.draft_post_1.slug}))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+    @override_settings(CONDITIONAL_GET=False)
+    def test_disabled_by_setting(self):
+        """При CONDITIONAL_GET=False ответ всегда полный."""
+        response = self.client.get(self.detail_url)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+
+@override_settings(PAGE_CACHE=True)
+class SharedPageCacheTest(BlogViewsBaseTest):
+    """
+    Тесты общего кэша страниц с персональными фрагментами
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.post = self.__class__.published_post_1
+        self.url = reverse('blog:post_detail', kwargs={'slug': self.post.slug})
+        self.reader = User.objects.create_user(username='reader', password='password123')
+
+    def test_cached_shell_is_personalized_for_each_user(self):
+        """Оболочка рендерится один раз, меню, CSRF-токен и кнопки автора - для каждого пользователя."""
+        self.client.login(username=self.user.username, password='password123')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Редактировать')
+        self.assertContains(response, 'data-user-authenticated="true"')
+
+        reader = Client(enforce_csrf_checks=True)
+        reader.login(username='reader', password='password123')
+        response = reader.get(self.url)
+        self.assertTemplateNotUsed(response, 'blog/post_detail.html')
+        self.assertNotContains(response, 'Редактировать')
+        self.assertContains(response, 'reader')
+        self.assertNotContains(response, '<!--personal:')
+        # Токен из оболочки принадлежит текущему пользователю и проходит проверку CSRF
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        response = reader.post(reverse('blog:comment_create_view', kwargs={'pk': self.post.pk}),
+                               {'content': 'Комментарий со страницы из кэша', 'csrfmiddlewaretoken': token},
+                               HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(author=self.reader, content='Комментарий со страницы из кэша').exists())
+
+        response = Client().get(self.url)
+        self.assertContains(response, 'data-user-authenticated="false"')
+        self.assertContains(response, reverse('accounts:login'))
+
+    def test_shared_page_marker(self):
+        """Только страница из общего кэша помечена для загрузки оценок пользователя скриптом."""
+        self.assertContains(self.client.get(self.url), 'data-shared-page="true"')
+        with self.settings(PAGE_CACHE=False):
+            self.assertNotContains(self.client.get(self.url), 'data-shared-page')
+
+    def test_cache_hit_for_anonymous_costs_one_query(self):
+        """Страница из кэша для гостя - только запрос версии данных."""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertContains(response, self.post.title)
+
+    def test_new_comment_invalidates_cached_page(self):
+        """Новый комментарий меняет версию страницы и ключ кэша."""
+        self.client.get(self.url)
+        Comment.objects.create(post=self.post, author=self.reader, content='Свежий комментарий')
+        self.assertContains(self.client.get(self.url), 'Свежий комментарий')
+
+    def test_cached_shell_keeps_response_headers(self):
+        """Ответ из кэша получает заголовки исходного ответа."""
+        class HeadersView(SharedPageCacheMixin, TemplateView):
+            template_name = 'includes/personal/auth_flag.html'
+            page_version = 'headers-test'
+
+            def render_to_response(self, context, **response_kwargs):
+                response = super().render_to_response(context, **response_kwargs)
+                response['Content-Language'] = 'ru'
+                patch_vary_headers(response, ['Accept-Language'])
+                patch_cache_control(response, max_age=60)
+                return response
+
+        request = RequestFactory().get('/headers-test/')
+        request.user = AnonymousUser()
+        HeadersView.as_view()(request)
+        response = HeadersView.as_view()(request)
+        # Второй ответ собран из оболочки в кэше, а не отрендерен заново
+        self.assertNotIsInstance(response, TemplateResponse)
+        self.assertEqual(response['Content-Language'], 'ru')
+        self.assertEqual(response['Vary'], 'Accept-Language')
+        self.assertEqual(response['Cache-Control'], 'max-age=60')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+    def test_feed_is_cached(self):
+        """Лента тоже отдается из общего кэша."""
+        self.client.get(reverse('blog:home'))
+        response = self.client.get(reverse('blog:home'))
+        self.assertTemplateNotUsed(response, 'blog/post_list.html')
+        self.assertContains(response, self.post.title)
+
+
 class PostSearchViewTest(BlogViewsBaseTest):
     def setUp(self):
         super().setUp()
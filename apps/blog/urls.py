@@ -7,6 +7,8 @@ from .views import (PostListView,
                     PostUpdateView,
                     CommentCreateView,
                     RatingCreateView,
+                    RatingBatchView,
+                    PostEventsView,
                     PostSearchView)
 
 app_name = 'blog'
@@ -16,8 +18,10 @@ urlpatterns = [
     path('post/<slug:slug>/update/', PostUpdateView.as_view(), name='post_update'),
     path('post/<slug:slug>', PostDetailView.as_view(), name='post_detail'),
     path('post/<int:pk>/comments/create/', CommentCreateView.as_view(), name='comment_create_view'),
+    path('post/<int:pk>/events/', PostEventsView.as_view(), name='post_events'),
     path('category/<slug:slug>/', PostFromCategory.as_view(), name='post_by_category'),
     path('rating/', RatingCreateView.as_view(), name='rating'),
+    path('rating/batch/', RatingBatchView.as_view(), name='rating_batch'),
     path('search/', PostSearchView.as_view(), name='post_search'),
     path('my-posts/', UserPostListView.as_view(), name='my_posts')
 ]
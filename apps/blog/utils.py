@@ -0,0 +1,245 @@
+import hashlib
+from collections import defaultdict
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Category, Comment, Post, Rating
+
+CATEGORY_LIST_KEY = 'category_list'
+POSTS_VERSION_KEY = 'posts_version'
+
+
+def _order_siblings(comments):
+    """
+    Сортировка соседних узлов так же, как это делает MPTT по order_insertion_by
+    """
+    for field in reversed(Comment._mptt_meta.order_insertion_by):
+        comments.sort(key=lambda comment: getattr(comment, field.lstrip('-')), reverse=field.startswith('-'))
+    return comments
+
+
+def _number_tree(root, children, tree_id):
+    """
+    Расчет tree_id, lft, rght и level для дерева, построенного в памяти
+    """
+    counter = 1
+    stack = [(root, 0, False)]
+    while stack:
+        node, level, visited = stack.pop()
+        if visited:
+            node.rght = counter
+            counter += 1
+            continue
+        node.tree_id, node.lft, node.level = tree_id, counter, level
+        counter += 1
+        stack.append((node, level, True))
+        stack.extend((child, level + 1, False) for child in reversed(_order_siblings(children[id(node)])))
+
+
+def import_comments(records, batch_size=1000):
+    """
+    Массовая загрузка комментариев (перенос с других форумов, наполнение базы).
+
+    records - последовательность словарей с ключами:
+        key - идентификатор комментария в загружаемых данных,
+        post - id записи, author - id автора, content - текст,
+        parent - key родителя из тех же данных (необязательно),
+        parent_pk - id уже существующего комментария, на который дан ответ (необязательно),
+        time_create, status (необязательно).
+
+    Комментарии вставляются через bulk_create, минуя пересчет lft/rght на каждую вставку.
+    Поля MPTT новых деревьев рассчитываются в памяти до вставки, а существующие деревья,
+    в которые добавлены ответы, перестраиваются через partial_rebuild - остальные деревья не затрагиваются.
+    Новые деревья получают tree_id после всех существующих (между собой - в порядке order_insertion_by),
+    поэтому порядок деревьев по tree_id может отличаться от результата rebuild(), который расставляет
+    новые корни среди существующих; выровнять его можно командой rebuild_comments.
+    Циклические ссылки на родителя в данных - ошибка ValueError.
+    Возвращает список созданных комментариев.
+    """
+    records = list(records)
+    by_key = {record['key']: record for record in records}
+    existing_parents = {
+        parent['pk']: parent for parent in Comment.objects.filter(
+            pk__in={record['parent_pk'] for record in records if record.get('parent_pk')}
+        ).values('pk', 'post_id', 'tree_id')
+    }
+
+    for record in records:
+        parent_key, parent_pk = record.get('parent'), record.get('parent_pk')
+        if parent_key is not None and by_key.get(parent_key, {}).get('post') != record['post']:
+            raise ValueError(f'Комментарий {record["key"]}: родитель {parent_key} не найден у записи {record["post"]}.')
+        if parent_pk and existing_parents.get(parent_pk, {}).get('post_id') != record['post']:
+            raise ValueError(f'Комментарий {record["key"]}: родитель {parent_pk} не найден у записи {record["post"]}.')
+
+    depths = {}
+
+    def depth(record):
+        # Подъем к корню без рекурсии: глубокие ветки не упираются в лимит рекурсии, циклы обнаруживаются
+        key, path, visited = record['key'], [], set()
+        while key not in depths:
+            if key in visited:
+                raise ValueError(f'Комментарий {record["key"]}: циклическая ссылка на родителя {key}.')
+            visited.add(key)
+            parent_key = by_key[key].get('parent')
+            if parent_key is None:
+                depths[key] = 0
+                break
+            path.append(key)
+            key = parent_key
+        current = depths[key]
+        for key in reversed(path):
+            current += 1
+            depths[key] = current
+        return depths[record['key']]
+
+    # Комментарии без времени получат его при вставке по порядку следования, так же их и сортируем
+    now = timezone.now()
+    comments = {}
+    children = defaultdict(list)
+    new_roots = []
+    replies_to_existing = []
+    for index, record in enumerate(sorted(records, key=depth)):
+        comment = Comment(post_id=record['post'], author_id=record['author'], content=record['content'],
+                          status=record.get('status', 'published'),
+                          time_create=record.get('time_create') or now + timedelta(microseconds=index))
+        comments[record['key']] = comment
+        if record.get('parent') is not None:
+            comment.parent = comments[record['parent']]
+            children[id(comment.parent)].append(comment)
+        elif record.get('parent_pk'):
+            comment.parent_id = record['parent_pk']
+            replies_to_existing.append(comment)
+        else:
+            new_roots.append(comment)
+
+    with transaction.atomic():
+        next_tree_id = (Comment.objects.aggregate(max_tree=Max('tree_id'))['max_tree'] or 0) + 1
+        for tree_id, root in enumerate(_order_siblings(new_roots), start=next_tree_id):
+            _number_tree(root, children, tree_id)
+
+        # Ветки в существующих деревьях получают tree_id родителя, границы пересчитает partial_rebuild
+        affected_trees = set()
+        for comment in replies_to_existing:
+            tree_id = existing_parents[comment.parent_id]['tree_id']
+            _number_tree(comment, children, tree_id)
+            affected_trees.add(tree_id)
+
+        # Уровни вставляются по очереди, чтобы у ответов уже был заполнен parent_id
+        levels = defaultdict(list)
+        for key, comment in comments.items():
+            levels[depths[key]].append(comment)
+        for level in sorted(levels):
+            Comment.objects.bulk_create(levels[level], batch_size=batch_size)
+
+        # auto_now_add заменяет время при вставке, исходное время восстанавливается отдельно
+        dated = []
+        for key, comment in comments.items():
+            if by_key[key].get('time_create'):
+                comment.time_create = by_key[key]['time_create']
+                dated.append(comment)
+        Comment.objects.bulk_update(dated, ['time_create'], batch_size=batch_size)
+
+        for tree_id in sorted(affected_trees):
+            Comment.objects.partial_rebuild(tree_id)
+        transaction.on_commit(bump_posts_version)
+    return list(comments.values())
+
+
+def author_stats_key(user_id):
+    return f'author_stats:{user_id}'
+
+
+def get_author_stats(user_id, recent_count=5):
+    """
+    Статистика автора для страницы профиля: количество опубликованных записей и комментариев,
+    сумма оценок его записей (одним запросом с подзапросами) и последние записи.
+    Результат кэшируется на AUTHOR_STATS_CACHE_TIMEOUT и сбрасывается сигналами при изменении
+    записей, комментариев и оценок автора.
+    """
+    key = author_stats_key(user_id)
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+
+    posts = Post.objects.filter(author=OuterRef('pk'), status='published').order_by().values('author')
+    ratings = (Rating.objects.filter(post__author=OuterRef('pk'), post__status='published')
+               .order_by().values('post__author'))
+    comments = Comment.objects.filter(author=OuterRef('pk'), status='published').order_by().values('author')
+    stats = User.objects.filter(pk=user_id).annotate(
+        posts_count=Coalesce(Subquery(posts.annotate(total=Count('pk')).values('total')), 0),
+        rating_total=Coalesce(Subquery(ratings.annotate(total=Sum('value')).values('total')), 0),
+        comments_count=Coalesce(Subquery(comments.annotate(total=Count('pk')).values('total')), 0),
+    ).values('posts_count', 'rating_total', 'comments_count').first()
+    if stats is None:
+        return None
+
+    stats['recent_posts'] = list(
+        Post.objects.filter(author_id=user_id, status='published').order_by('-create')
+        .values('title', 'slug', 'create')[:recent_count]
+    )
+    cache.set(key, stats, settings.AUTHOR_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def clear_author_stats(user_id):
+    """
+    Сброс статистики автора (вызывается при изменении его записей, комментариев или оценок его записей)
+    """
+    if user_id is not None:
+        cache.delete(author_stats_key(user_id))
+
+
+def get_category_list():
+    """
+    Категории для боковой панели с количеством опубликованных записей и датой последней из них:
+    одним запросом с агрегатами, результат кэшируется на CATEGORY_LIST_CACHE_TIMEOUT и сбрасывается
+    сигналами при изменении записей и категорий.
+    Возвращает словарь: categories - список категорий, version - версия списка для условного GET.
+    """
+    listing = cache.get(CATEGORY_LIST_KEY)
+    if listing is not None:
+        return listing
+
+    published = Q(posts__status='published')
+    categories = list(
+        Category.objects.annotate(posts_count=Count('posts', filter=published),
+                                  latest_post=Max('posts__create', filter=published))
+        .order_by('pk').values('title', 'slug', 'posts_count', 'latest_post')
+    )
+    listing = {'categories': categories, 'version': hashlib.md5(repr(categories).encode('utf-8')).hexdigest()[:12]}
+    cache.set(CATEGORY_LIST_KEY, listing, settings.CATEGORY_LIST_CACHE_TIMEOUT)
+    return listing
+
+
+def clear_category_list():
+    """
+    Сброс кэша списка категорий (вызывается при изменении записей и категорий)
+    """
+    cache.delete(CATEGORY_LIST_KEY)
+
+
+def get_posts_version():
+    """
+    Версия данных ленты: записи, комментарии и оценки. Меняется сигналами после фиксации
+    изменений и учитывается в ETag лент вместо выборки версий каждой записи страницы
+    """
+    version = cache.get(POSTS_VERSION_KEY)
+    if version is None:
+        cache.add(POSTS_VERSION_KEY, uuid4().hex[:12], None)
+        version = cache.get(POSTS_VERSION_KEY)
+    return version
+
+
+def bump_posts_version():
+    """
+    Новая версия данных ленты (после изменения записей, комментариев и оценок)
+    """
+    cache.set(POSTS_VERSION_KEY, uuid4().hex[:12], None)
@@ -1,4 +1,9 @@
-from django.http import JsonResponse
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.contrib.messages.views import SuccessMessageMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, View, FormView
@@ -6,19 +11,65 @@ from .models import Post, Category, Rating, Comment
 from django.shortcuts import get_object_or_404, redirect, render
 from .forms import PostCreateForm, PostUpdateForm, CommentCreateForm, SearchForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from ..services.mixins import AuthorRequiredMixin
+from ..accounts.utils import get_author_cards, get_profiles_version
+from .utils import get_category_list, get_posts_version
+from ..services.mixins import (AuthorRequiredMixin, AsyncLoginRequiredMixin, ConditionalGetMixin, ReadReplicaMixin,
+                              SharedPageCacheMixin)
+from ..services.pubsub import get_broker, post_channel, publish
 from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
 from django.contrib.postgres.search import TrigramSimilarity
-from django.db.models import Value
+from django.db.models import Count, Max, Value
 from django.db.models.functions import Lower
 
 
-class PostListView(ListView):
+VERSION_FIELDS = ('pk', 'update', 'rating_sum', 'rating_count', 'rating_updated', 'comments_count',
+                  'comments_updated', 'last_user_id')
+
+
+def get_page_validators(rows, *extra):
+    """
+    Версия страницы по строкам PostQuerySet.with_versions(),
+    версиям списка категорий и данных пользователей (карточки авторов, счетчики GeoStat) из кэша
+    """
+    version = ';'.join([':'.join(str(row[field]) for field in VERSION_FIELDS) for row in rows] +
+                       [str(value) for value in extra] +
+                       [get_category_list()['version'], get_profiles_version()])
+    return version
+
+
+class ConditionalPostListMixin(ConditionalGetMixin):
+    """
+    Условный GET для ленты записей: количество записей (от него зависит пагинация) и время
+    последнего изменения - одним агрегатом без выборки строк страницы, изменения комментариев
+    и оценок учитываются версией данных ленты из кэша (get_posts_version)
+    """
+
+    def get_validator_queryset(self):
+        return Post.custom.published()
+
+    def get_validators(self):
+        try:
+            page = int(self.request.GET.get(self.page_kwarg) or 1)
+        except ValueError:
+            return None
+        if page < 1:
+            return None
+        totals = self.get_validator_queryset().order_by().aggregate(posts_count=Count('pk'), updated=Max('update'))
+        # Несуществующие страницы не проверяются (404)
+        if page > 1 and (page - 1) * self.paginate_by >= totals['posts_count']:
+            return None
+        return get_page_validators([], totals['posts_count'], totals['updated'], get_posts_version())
+
+
+class PostListView(ReadReplicaMixin, ConditionalPostListMixin, SharedPageCacheMixin, ListView):
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     paginate_by = 5
-    queryset = Post.custom.published()
+
+    def get_queryset(self):
+        return Post.custom.published().with_rating(self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -41,33 +92,44 @@ class UserPostListView(LoginRequiredMixin, ListView):
         return context
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ReadReplicaMixin, ConditionalGetMixin, SharedPageCacheMixin, DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
 
+    def get_validators(self):
+        row = (Post.custom.published().filter(slug=self.kwargs['slug']).with_rating().with_versions()
+               .values(*VERSION_FIELDS).first())
+        return get_page_validators([row]) if row else None
+
     def get_queryset(self):
-        return Post.custom.published()
+        return Post.custom.published().select_related('updater__profile').with_rating(self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = self.object.title
+        context['comments'] = comments = list(self.object.comments.all())
+        context['author_cards'] = get_author_cards({comment.author_id for comment in comments})
         context['form'] = CommentCreateForm()
+        context['sse_enabled'] = settings.SSE_ENABLED
         return context
 
 
-class PostFromCategory(ListView):
+class PostFromCategory(ReadReplicaMixin, ConditionalPostListMixin, SharedPageCacheMixin, ListView):
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     category = None
     paginate_by = 5
 
+    def get_validator_queryset(self):
+        return Post.custom.published().filter(category__slug=self.kwargs['slug'])
+
     def get_queryset(self):
         """
         Возвращает рецепты только для текущей категории.
         """
         self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
-        return Post.custom.published().filter(category=self.category)
+        return Post.custom.published().filter(category=self.category).with_rating(self.request.user)
 
     def get_context_data(self, **kwargs):
         """
@@ -121,19 +183,22 @@ class PostUpdateView(AuthorRequiredMixin, SuccessMessageMixin, UpdateView):
         return reverse_lazy('blog:post_detail', kwargs={'slug': self.object.slug})
 
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(AsyncLoginRequiredMixin, CreateView):
+    """
+    Асинхронное добавление комментариев (AJAX и обычная отправка формы)
+    """
     login_url = 'blog:home'
     form_class = CommentCreateForm
     template_name = 'blog/post_detail.html'
+    http_method_names = ['post']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post_pk = self.kwargs.get('pk')
-        try:
-            post = get_object_or_404(Post, pk=post_pk)
+        post = Post.custom.published().with_rating(self.request.user).filter(pk=self.kwargs.get('pk')).first()
+        if post is not None:
             context['post'] = post
-        except Exception:
-            pass
+            context['comments'] = comments = list(post.comments.all())
+            context['author_cards'] = get_author_cards({comment.author_id for comment in comments})
         return context
 
     def get_permission_denied_url(self):
@@ -143,43 +208,59 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return self.request.accepts("application/json") or self.request.headers.get(
             'X-Requested-With') == 'XMLHttpRequest'
 
-    def form_invalid(self, form):
+    async def post(self, request, *args, **kwargs):
+        self.object = None
+        form = self.get_form()
+        if form.is_valid():
+            return await self.form_valid(form)
+        return await self.form_invalid(form)
+
+    async def form_invalid(self, form):
         if self.is_ajax():
             return JsonResponse({'success': False, 'errors': form.errors.as_json()}, status=400)
-        return super().form_invalid(form)
+        return await sync_to_async(super().form_invalid)(form)
 
-    def form_valid(self, form):
-        comment = form.save(commit=False)
+    async def get_post_and_parent(self, parent_id):
+        """
+        Запись и родительский комментарий: при ответе одним запросом (родитель вместе с записью),
+        родитель из другой записи или несуществующий игнорируется
+        """
         post_pk = self.kwargs.get('pk')
-        try:
-            post = get_object_or_404(Post, pk=post_pk)
-            comment.post = post
-        except Exception:
+        if parent_id:
+            parent = await Comment.objects.select_related('post').filter(pk=parent_id, post_id=post_pk).afirst()
+            if parent is not None:
+                return parent.post, parent
+        return await Post.objects.filter(pk=post_pk).afirst(), None
+
+    async def form_valid(self, form):
+        post, parent = await self.get_post_and_parent(form.cleaned_data.get('parent'))
+        if post is None:
             if self.is_ajax():
                 return JsonResponse({'success': False, 'error': 'Пост не найден.'}, status=404)
             return redirect('blog:home')
 
-        comment.author = self.request.user
-
-        parent_id = form.cleaned_data.get('parent')
-        if parent_id:
-            try:
-                comment.parent = Comment.objects.get(pk=parent_id)
-            except Comment.DoesNotExist:
-                comment.parent = None
-
-        comment.save()
-
-        comment.refresh_from_db()
+        author = await self.request.auser()
+        comment = form.save(commit=False)
+        comment.post = post
+        comment.author = author
+        comment.parent = parent
+        # Поля MPTT и время создания заполняются на объекте при сохранении, перечитывать его не нужно
+        await comment.asave()
+        self.object = comment
+
+        comment_html = await sync_to_async(render_to_string)(
+            'blog/comments/single_comment_node.html',
+            {'node': comment, 'request': self.request},
+        )
+        if settings.SSE_ENABLED:
+            publish(post_channel(post.pk), {
+                'event': 'comment', 'id': comment.pk, 'parent_id': comment.parent_id, 'html': comment_html,
+            })
 
         if self.is_ajax():
-            comment_html = render_to_string(
-                'blog/comments/single_comment_node.html',
-                {'node': comment, 'request': self.request},
-            )
             return JsonResponse({'success': True, 'comment_html': comment_html}, status=200)
 
-        return redirect(reverse_lazy('blog:post_detail', kwargs={'slug': comment.post.slug}))
+        return redirect(reverse_lazy('blog:post_detail', kwargs={'slug': post.slug}))
 
     def handle_no_permission(self):
         if self.is_ajax():
@@ -191,39 +272,120 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return reverse_lazy('blog:post_detail', kwargs={'slug': self.object.post.slug})
 
 
-class RatingCreateView(LoginRequiredMixin, View):
+class RatingCreateView(AsyncLoginRequiredMixin, View):
+    """
+    Асинхронная установка оценки записи: повторная оценка с тем же значением отменяет её
+    """
     model = Rating
 
     def handle_no_permission(self):
         return JsonResponse({'error': 'Вы должны быть зарегистрированы, чтобы ставить оценки.'}, status=403)
 
-    def post(self, request, *args, **kwargs):
-        post_id = request.POST.get('post_id')
-        value = int(request.POST.get('value'))
+    async def post(self, request, *args, **kwargs):
+        try:
+            post_id = int(request.POST.get('post_id', ''))
+            value = int(request.POST.get('value', ''))
+        except ValueError:
+            return JsonResponse({'error': 'Некорректная запись или оценка.'}, status=400)
+        if value not in dict(self.model._meta.get_field('value').choices):
+            return JsonResponse({'error': 'Некорректная оценка.'}, status=400)
 
         try:
-            post = Post.objects.get(pk=post_id)
+            post = await Post.objects.aget(pk=post_id)
         except Post.DoesNotExist:
             return JsonResponse({'error': 'Запись не найдена.'}, status=404)
 
-        rating, created = self.model.objects.get_or_create(
+        rating, created = await self.model.objects.aget_or_create(
             post=post,
-            user=request.user,
+            user=await request.auser(),
             defaults={'value': value}
         )
 
         if not created:
+            # Запись уже загружена: сигнал сброса статистики автора берет ее без запроса
+            rating.post = post
             if rating.value == value:
-                rating.delete()
+                await rating.adelete()
             else:
                 rating.value = value
-                rating.save()
+                await rating.asave(update_fields=['value'])
 
-        post.refresh_from_db()
-        return JsonResponse({'rating_sum': post.get_sum_rating()})
+        rating_sum = await post.aget_sum_rating()
+        if settings.SSE_ENABLED:
+            publish(post_channel(post.pk), {'event': 'rating', 'post_id': post.pk, 'rating_sum': rating_sum})
+        return JsonResponse({'rating_sum': rating_sum})
 
 
-class PostSearchView(ListView):
+class RatingBatchView(View):
+    """
+    Суммы оценок и оценки текущего пользователя для списка записей одним запросом:
+    GET /rating/batch/?ids=1,2,3. Лента может отдаваться из общего кэша и дополняться на клиенте.
+    """
+    max_ids = 100
+    # Служебный запрос страницы, активность отмечает сама страница
+    track_last_seen = False
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            ids = {int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()}
+        except ValueError:
+            return JsonResponse({'error': 'Некорректный список записей.'}, status=400)
+        if len(ids) > self.max_ids:
+            return JsonResponse({'error': f'За один запрос можно получить не больше {self.max_ids} записей.'},
+                                status=400)
+
+        user = await request.auser()
+        fields = ('pk', 'rating_sum', 'user_vote') if user.is_authenticated else ('pk', 'rating_sum')
+        ratings = {}
+        if ids:
+            async for row in Post.custom.published().filter(pk__in=ids).with_rating(user).values(*fields):
+                ratings[row['pk']] = {'rating_sum': row['rating_sum'], 'user_vote': row.get('user_vote')}
+
+        response = JsonResponse({'ratings': ratings})
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class PostEventsView(View):
+    """
+    Поток server-sent events записи: новые комментарии (готовый HTML) и изменения суммы оценок.
+    Соединение держится долго, поэтому представление асинхронное и рассчитано на ASGI-сервер;
+    без SSE_ENABLED поток не открывается.
+    """
+    track_last_seen = False
+
+    async def get(self, request, *args, **kwargs):
+        if not settings.SSE_ENABLED:
+            raise Http404('Обновления в реальном времени отключены.')
+        if not await Post.custom.published().filter(pk=self.kwargs['pk']).aexists():
+            raise Http404('Запись не найдена.')
+
+        response = StreamingHttpResponse(self.stream(post_channel(self.kwargs['pk'])),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, channel):
+        subscription = get_broker().subscribe(channel)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SSE_MAX_SECONDS
+        try:
+            yield f'retry: {int(settings.SSE_KEEPALIVE_SECONDS * 1000)}\n\n'
+            while loop.time() < deadline:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                # Одно и то же сообщение получают все подписчики, поэтому оно не изменяется
+                data = {key: value for key, value in message.items() if key != 'event'}
+                yield f'event: {message["event"]}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+        finally:
+            subscription.close()
+
+
+class PostSearchView(ReadReplicaMixin, ListView):
     model = Post
     template_name = 'blog/post_search.html'
     context_object_name = 'posts'
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """
+    Админ-панель очереди исходящих писем
+    """
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'time_create', 'time_sent')
+    list_filter = ('status',)
+    search_fields = ('subject',)
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class ServicesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.services'
+    verbose_name = 'Сервисы'
+
+    def ready(self):
+        from .template_tools import install_render_timing, warmup_templates
+
+        if settings.TEMPLATE_RENDER_TIMING:
+            install_render_timing()
+        if settings.TEMPLATE_WARMUP:
+            warmup_templates()
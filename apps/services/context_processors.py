@@ -1,30 +1,25 @@
-from apps.blog.models import Category
-from apps.accounts.models import Profile
-from django.contrib.auth.models import User
+from apps.blog.utils import get_category_list
+from apps.accounts.geo import get_geo_summary
 import datetime
 
 
 def categories_processor(request):
     """
-    Добавляет все категории в контекст для каждого запроса.
+    Добавляет все категории с количеством записей в контекст для каждого запроса (из кэша).
     """
-    return {'categories': Category.objects.all()}
+    return {'categories': get_category_list()['categories']}
 
 
 def data_processor(request):
     """
     Добавляет подсчет количества пользователей, стран и городов, где они проживают,
-    а также текущий год.
+    а также текущий год. Счетчики берутся одним запросом из материализованной статистики GeoStat.
     """
-    total_users = User.objects.count()
-    unique_cities_count = Profile.objects.filter(city__isnull=False).exclude(city__exact='').values(
-        'city').distinct().count()
-    unique_countries_count = Profile.objects.filter(country__isnull=False).exclude(country__exact='').values(
-        'country').distinct().count()
+    summary = get_geo_summary()
 
     return {
-        'total_users_count': total_users,
-        'unique_cities_count': unique_cities_count,
-        'unique_countries_count': unique_countries_count,
+        'total_users_count': summary['total_users'],
+        'unique_cities_count': summary['cities'],
+        'unique_countries_count': summary['countries'],
         'current_year': datetime.datetime.now().year,  # Добавлено
     }
@@ -0,0 +1,207 @@
+import random
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, Max
+
+from apps.accounts.geo import apply_geo_deltas, find_city_ids
+from apps.accounts.models import Profile
+from apps.accounts.utils import bump_profiles_version
+from apps.blog.models import Category, Comment, Post, Rating
+from apps.blog.utils import bump_posts_version
+
+WORDS = (
+    'игра', 'турнир', 'стратегия', 'команда', 'рейтинг', 'обзор', 'гайд', 'патч', 'сезон', 'герой',
+    'карта', 'арена', 'режим', 'кооператив', 'спидран', 'мод', 'лига', 'финал', 'баланс', 'билд',
+)
+LOCATIONS = (
+    ('RU', 'Москва'), ('RU', 'Санкт-Петербург'), ('RU', 'Казань'), ('BY', 'Минск'), ('KZ', 'Алматы'),
+    ('UA', 'Киев'), ('DE', 'Берлин'), ('US', 'New York'), ('FR', 'Paris'), ('JP', 'Tokyo'),
+)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def newest_comments_first():
+    """
+    Новые комментарии идут перед старыми (order_insertion_by = ('-time_create',)),
+    в режиме COMMENTS_APPEND_ONLY - в порядке создания
+    """
+    return list(Comment._mptt_meta.order_insertion_by[:1]) == ['-time_create']
+
+
+def build_comment_forest(size, max_depth, rng, newest_first=True):
+    """
+    Случайный лес комментариев из size узлов глубиной не больше max_depth.
+    Возвращает узлы в порядке создания: словари parent (индекс или None), level, tree (номер дерева
+    в порядке создания корней), lft и rght. Соседние ответы при newest_first идут от новых к старым.
+    Новые ответы чаще приходят в свежие ветки, поэтому деревья получаются глубокими.
+    """
+    nodes = []
+    children = []
+    roots = []
+    for index in range(size):
+        candidates = [node for node in range(max(index - 5, 0), index) if nodes[node]['level'] < max_depth - 1]
+        if not candidates or rng.random() < 0.2:
+            nodes.append({'parent': None, 'level': 0, 'tree': len(roots)})
+            roots.append(index)
+        else:
+            parent = rng.choice(candidates)
+            nodes.append({'parent': parent, 'level': nodes[parent]['level'] + 1, 'tree': nodes[parent]['tree']})
+            children[parent].append(index)
+        children.append([])
+
+    for root in roots:
+        counter = 1
+        # Обход в глубину: из стека первым берется последний добавленный ответ
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                nodes[node]['rght'] = counter
+                counter += 1
+                continue
+            nodes[node]['lft'] = counter
+            counter += 1
+            stack.append((node, True))
+            siblings = children[node] if newest_first else reversed(children[node])
+            stack.extend((child, False) for child in siblings)
+    return nodes
+
+
+class DatasetGenerator:
+    """
+    Генератор синтетических данных для нагрузочного тестирования: пользователи с профилями,
+    категории, записи, деревья комментариев и оценки. Все объекты создаются через bulk_create,
+    поля MPTT рассчитываются в памяти.
+    """
+
+    def __init__(self, prefix='synthetic', password='password', batch_size=5000, seed=None):
+        self.prefix = prefix
+        self.password = password
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def average(remaining, posts_left):
+        """
+        Среднее количество объектов на запись, пересчитываемое по остатку, чтобы итог был близок к заданному
+        """
+        return -(-remaining // posts_left)
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def create_users(self, count):
+        start = User.objects.filter(username__startswith=f'{self.prefix}_').count()
+        password = make_password(self.password)
+        city_ids = find_city_ids(LOCATIONS)
+        user_ids = []
+        for batch in chunks(range(start, start + count), self.batch_size):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f'{self.prefix}_{index}', email=f'{self.prefix}_{index}@example.com',
+                         password=password)
+                    for index in batch
+                ])
+                profiles = []
+                for user in users:
+                    country, city = self.rng.choice(LOCATIONS)
+                    profiles.append(Profile(user=user, slug=user.username.replace('_', '-'), country=country,
+                                            city_id=city_ids.get((country, city))))
+                Profile.objects.bulk_create(profiles)
+                apply_geo_deltas(Counter(profile.geo_key() for profile in profiles))
+            user_ids.extend(user.pk for user in users)
+        bump_profiles_version()
+        return user_ids
+
+    def create_categories(self, count):
+        start = Category.objects.filter(slug__startswith=f'{self.prefix}-category-').count()
+        categories = Category.objects.bulk_create([
+            Category(title=f'{self.sentence(2)} {index}', slug=f'{self.prefix}-category-{index}')
+            for index in range(start, start + count)
+        ])
+        return [category.pk for category in categories]
+
+    def create_posts(self, count, user_ids, category_ids):
+        start = Post.objects.filter(slug__startswith=f'{self.prefix}-post-').count()
+        post_ids = []
+        for batch in chunks(range(start, start + count), self.batch_size):
+            with transaction.atomic():
+                posts = Post.objects.bulk_create([
+                    Post(title=self.sentence(4), slug=f'{self.prefix}-post-{index}', description=self.sentence(12),
+                         text=self.sentence(80), author_id=self.rng.choice(user_ids),
+                         category_id=self.rng.choice(category_ids))
+                    for index in batch
+                ])
+            post_ids.extend(post.pk for post in posts)
+        return post_ids
+
+    def create_comments(self, count, post_ids, user_ids, max_depth=10):
+        """
+        Создает до count комментариев, распределенных по записям деревьями с готовыми tree_id, lft, rght, level.
+        Уровни вставляются по очереди, чтобы у ответов уже был первичный ключ родителя.
+        Новые деревья получают tree_id после существующих, между собой - в порядке order_insertion_by:
+        при ('-time_create',) номера выдаются в порядке создания и в конце разворачиваются одним UPDATE.
+        """
+        newest_first = newest_comments_first()
+        first_tree_id = next_tree_id = (Comment.objects.aggregate(max_tree=Max('tree_id'))['max_tree'] or 0) + 1
+        created = 0
+        pending = []
+        for position, post_id in enumerate(post_ids):
+            if created >= count:
+                break
+            size = min(self.rng.randint(0, self.average(count - created, len(post_ids) - position) * 2),
+                       count - created)
+            forest = build_comment_forest(size, max_depth, self.rng, newest_first)
+            comments = []
+            for node in forest:
+                comments.append(Comment(
+                    post_id=post_id, author_id=self.rng.choice(user_ids), content=self.sentence(15),
+                    parent=comments[node['parent']] if node['parent'] is not None else None,
+                    tree_id=next_tree_id + node['tree'], lft=node['lft'], rght=node['rght'], level=node['level'],
+                ))
+            next_tree_id += len([node for node in forest if node['parent'] is None])
+            pending.extend(comments)
+            created += size
+            if len(pending) >= self.batch_size:
+                self._insert_comments(pending)
+                pending = []
+        self._insert_comments(pending)
+        last_tree_id = next_tree_id - 1
+        if newest_first and last_tree_id > first_tree_id:
+            Comment.objects.filter(tree_id__range=(first_tree_id, last_tree_id)).update(
+                tree_id=first_tree_id + last_tree_id - F('tree_id'))
+        bump_posts_version()
+        return created
+
+    def _insert_comments(self, comments):
+        with transaction.atomic():
+            for level in sorted({comment.level for comment in comments}):
+                Comment.objects.bulk_create([comment for comment in comments if comment.level == level],
+                                            batch_size=self.batch_size)
+
+    def create_ratings(self, count, post_ids, user_ids):
+        created = 0
+        pending = []
+        for position, post_id in enumerate(post_ids):
+            if created >= count:
+                break
+            average = self.average(count - created, len(post_ids) - position)
+            voters = self.rng.sample(user_ids, min(self.rng.randint(0, average * 2), len(user_ids), count - created))
+            pending.extend(
+                Rating(post_id=post_id, user_id=user_id, value=1 if self.rng.random() < 0.75 else -1)
+                for user_id in voters
+            )
+            created += len(voters)
+            if len(pending) >= self.batch_size:
+                Rating.objects.bulk_create(pending, batch_size=self.batch_size)
+                pending = []
+        Rating.objects.bulk_create(pending, batch_size=self.batch_size)
+        bump_posts_version()
+        return created
@@ -0,0 +1,180 @@
+import http.cookiejar
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, percent):
+    """
+    Перцентиль по методу ближайшего ранга (values должны быть отсортированы)
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+class LoadTestResult:
+    """
+    Результат нагрузочного прогона: задержки успешных запросов, ошибки и общее время
+    """
+
+    def __init__(self, label, latencies, errors, duration):
+        self.label = label
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.duration = duration
+
+    @property
+    def total(self):
+        return len(self.latencies) + self.errors
+
+    @property
+    def throughput(self):
+        return self.total / self.duration if self.duration else 0.0
+
+    def as_row(self):
+        """
+        Строка отчета: задержки в миллисекундах
+        """
+        return {
+            'label': self.label,
+            'requests': self.total,
+            'errors': self.errors,
+            'rps': round(self.throughput, 1),
+            'p50': round(percentile(self.latencies, 50) * 1000, 1),
+            'p95': round(percentile(self.latencies, 95) * 1000, 1),
+            'p99': round(percentile(self.latencies, 99) * 1000, 1),
+        }
+
+
+class HttpRequestSpec:
+    """
+    Описание HTTP-запроса для нагрузочного теста
+    """
+
+    def __init__(self, base_url, path, method='GET', data=None, headers=None):
+        self.url = base_url.rstrip('/') + urllib.parse.quote(path, safe='/?&=%:+,')
+        self.method = method
+        self.data = data.encode('utf-8') if data else None
+        self.headers = headers or {}
+
+    def send(self, timeout=30):
+        request = urllib.request.Request(self.url, data=self.data, method=self.method, headers=self.headers)
+        if self.data:
+            request.add_header('Content-Type', 'application/x-www-form-urlencoded')
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+
+def run_load(label, send, total, concurrency):
+    """
+    Выполняет total вызовов send(index) в concurrency потоков.
+    send возвращает HTTP-статус; статусы >= 400 и исключения считаются ошибками.
+    """
+    latencies = []
+    errors = 0
+
+    def worker(index):
+        started = time.perf_counter()
+        try:
+            status = send(index)
+        except OSError:
+            return None
+        if status >= 400:
+            return None
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency in executor.map(worker, range(total)):
+            if latency is None:
+                errors += 1
+            else:
+                latencies.append(latency)
+    return LoadTestResult(label, latencies, errors, time.perf_counter() - started)
+
+
+class SessionClient:
+    """
+    HTTP-клиент виртуального пользователя: хранит cookie сессии и подставляет CSRF-токен в изменяющие запросы
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    @property
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, method='GET', data=None, headers=None, timeout=30):
+        url = self.base_url + urllib.parse.quote(path, safe='/?&=%:+,')
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+        if method != 'GET':
+            request.add_header('X-CSRFToken', self.csrf_token)
+            request.add_header('Referer', self.base_url + '/')
+        try:
+            with self.opener.open(request, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def login(self, path, username, password):
+        self.request(path)
+        return self.request(path, 'POST', {'username': username, 'password': password,
+                                           'csrfmiddlewaretoken': self.csrf_token})
+
+
+def run_scenario(virtual_users, iterations, seed=None):
+    """
+    Каждый виртуальный пользователь в своем потоке выполняет iterations действий.
+    virtual_user(rng) возвращает пару (название действия, send), send() - HTTP-статус.
+    Возвращает LoadTestResult по каждому действию и итоговый под ключом 'всего'.
+    """
+    latencies = {}
+    errors = {}
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(None if seed is None else seed + index)
+        for _ in range(iterations):
+            label, send = virtual_users[index](rng)
+            started = time.perf_counter()
+            try:
+                status = send()
+            except OSError:
+                status = None
+            latency = time.perf_counter() - started
+            with lock:
+                if status is None or status >= 400:
+                    errors[label] = errors.get(label, 0) + 1
+                else:
+                    latencies.setdefault(label, []).append(latency)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(virtual_users)) as executor:
+        list(executor.map(worker, range(len(virtual_users))))
+    duration = time.perf_counter() - started
+
+    labels = sorted(set(latencies) | set(errors))
+    results = {label: LoadTestResult(label, latencies.get(label, []), errors.get(label, 0), duration)
+               for label in labels}
+    results['всего'] = LoadTestResult('всего', [value for values in latencies.values() for value in values],
+                                      sum(errors.values()), duration)
+    return results
@@ -0,0 +1,113 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    Почтовый бэкенд, который не отправляет письма, а ставит их в очередь OutboxEmail.
+    Отправку выполняет команда send_outbox через OUTBOX_EMAIL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        OutboxEmail.objects.bulk_create([OutboxEmail.from_message(message) for message in email_messages])
+        return len(email_messages)
+
+
+def get_retry_delay(attempts):
+    """
+    Экспоненциальная задержка перед следующей попыткой отправки
+    """
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), settings.OUTBOX_MAX_RETRY_DELAY))
+
+
+def mark_failed_attempt(email, error):
+    """
+    Учет неудачной попытки: планирование повтора или окончательная ошибка
+    """
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+
+
+def mark_sent(email):
+    email.status = 'sent'
+    email.attempts += 1
+    email.last_error = ''
+    email.time_sent = timezone.now()
+
+
+def claim_outbox(batch_size):
+    """
+    Выборка пачки писем и пометка их статусом sending в короткой транзакции.
+    Письма, взятые на отправку больше OUTBOX_CLAIM_TIMEOUT секунд назад (воркер остановлен
+    во время отправки), выбираются повторно.
+    """
+    now = timezone.now()
+    claimable = (Q(status='pending', next_attempt_at__lte=now)
+                 | Q(status='sending', claimed_at__lte=now - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)))
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(claimable).order_by('next_attempt_at')[:batch_size]
+        )
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(status='sending', claimed_at=now)
+    for email in emails:
+        email.status, email.claimed_at = 'sending', now
+    return emails
+
+
+def deliver_outbox(batch_size=None):
+    """
+    Отправка одной пачки писем из очереди через одно SMTP-соединение.
+    Письма берутся на отправку в отдельной транзакции, отправка идет вне транзакции
+    (без удержания блокировок на время сетевого обмена), результат сохраняется по каждому письму.
+    Возвращает кортеж (отправлено, не отправлено).
+    """
+    sent = failed = 0
+    emails = claim_outbox(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return sent, failed
+
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND, fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning('Не удалось открыть почтовое соединение: %s', error)
+        for email in emails:
+            mark_failed_attempt(email, error)
+        OutboxEmail.objects.bulk_update(emails, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+        return sent, len(emails)
+
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([email.to_message(connection)])
+            except Exception as error:
+                logger.warning('Ошибка отправки письма %s: %s', email.pk, error)
+                mark_failed_attempt(email, error)
+                failed += 1
+            else:
+                mark_sent(email)
+                sent += 1
+            email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'time_sent'])
+    finally:
+        connection.close()
+    return sent, failed
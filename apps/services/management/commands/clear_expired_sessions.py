@@ -0,0 +1,20 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+
+from apps.services.sessions import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    """
+    Очистка истекших сессий пачками (для cron), в отличие от clearsessions не удаляет
+    всю таблицу одним запросом. При SESSION_BACKEND=signed_cookies в базе сессий нет.
+    """
+    help = 'Удаление истекших сессий из базы данных пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Сессий за один DELETE')
+        parser.add_argument('--pause', type=float, default=0, help='Пауза между пачками (секунды)')
+
+    def handle(self, *args, **options):
+        deleted = clear_expired_sessions(Session, options['batch_size'], options['pause'])
+        self.stdout.write(f'Удалено истекших сессий: {deleted}')
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.services.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    """
+    Генерация синтетических данных в объеме, сравнимом с рабочим, для локального нагрузочного тестирования:
+        python manage.py generate_dataset --users 5000 --posts 100000 --comments 500000 --ratings 2000000
+    Пользователи создаются с логинами <prefix>_<N> и общим паролем --password (их использует loadtest_scenario).
+    """
+    help = 'Генерация пользователей, категорий, записей, деревьев комментариев и оценок через bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--ratings', type=int, default=1000000)
+        parser.add_argument('--max-depth', type=int, default=10, help='Максимальная глубина дерева комментариев')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='synthetic', help='Префикс логинов и слагов')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--seed', type=int, help='Зерно генератора случайных чисел для воспроизводимости')
+
+    def handle(self, *args, **options):
+        generator = DatasetGenerator(options['prefix'], options['password'], options['batch_size'], options['seed'])
+
+        user_ids = self.step('Пользователи', generator.create_users, options['users'])
+        category_ids = self.step('Категории', generator.create_categories, options['categories'])
+        post_ids = self.step('Записи', generator.create_posts, options['posts'], user_ids, category_ids)
+        self.step('Комментарии', generator.create_comments, options['comments'], post_ids, user_ids,
+                  options['max_depth'])
+        self.step('Оценки', generator.create_ratings, options['ratings'], post_ids, user_ids)
+
+    def step(self, label, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        created = result if isinstance(result, int) else len(result)
+        self.stdout.write(f'{label}: {created} за {time.perf_counter() - started:.1f} с')
+        return result
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.loadtest import HttpRequestSpec, run_load
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест запущенного сервера: пропускная способность и перцентили задержек.
+
+    Сравнение синхронного и асинхронного развертывания AJAX-эндпоинтов:
+        gunicorn yoko_multigame_website.wsgi -w 1 --threads 4 -b 127.0.0.1:8000
+        uvicorn yoko_multigame_website.asgi:application --workers 1 --port 8001
+        python manage.py loadtest --base-url http://127.0.0.1:8000 --compare-url http://127.0.0.1:8001 \
+            --path "/accounts/city-autocomplete/?term=мо" --requests 2000 --concurrency 100
+
+    Влияние пула соединений на задержку главной страницы (PostListView): тот же сервер
+    запускается дважды, с DB_POOL=False и DB_POOL=True, и прогоняется --path "/".
+    """
+    help = 'Нагрузочный тест HTTP-эндпоинта с отчетом о RPS и задержках (p50/p95/p99)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--compare-url', help='Второй сервер для сравнения (например, ASGI против WSGI)')
+        parser.add_argument('--path', default='/accounts/city-autocomplete/?term=мо')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', help='Тело запроса в формате application/x-www-form-urlencoded')
+        parser.add_argument('--header', action='append', default=[], help='Заголовок в формате "Имя: значение"')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        headers = dict(
+            (name.strip(), value.strip()) for name, value in (item.split(':', 1) for item in options['header'])
+        )
+        targets = [options['base_url']]
+        if options['compare_url']:
+            targets.append(options['compare_url'])
+
+        for base_url in targets:
+            spec = HttpRequestSpec(base_url, options['path'], options['method'], options['data'], headers)
+            result = run_load(base_url, lambda index: spec.send(), options['requests'], options['concurrency'])
+            self.write_row(result.as_row())
+
+    def write_row(self, row):
+        self.stdout.write(
+            f"{row['label']}: {row['requests']} запросов, ошибок {row['errors']}, "
+            f"{row['rps']} req/s, p50 {row['p50']} мс, p95 {row['p95']} мс, p99 {row['p99']} мс"
+        )
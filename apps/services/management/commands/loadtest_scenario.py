@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from apps.blog.models import Category, Post
+from apps.services.dataset import WORDS
+from apps.services.loadtest import SessionClient, run_scenario
+from apps.services.management.commands.loadtest import Command as LoadTestCommand
+
+
+class VirtualUser:
+    """
+    Посетитель сайта: анонимный только читает ленту, ищет и открывает записи,
+    авторизованный дополнительно голосует и комментирует
+    """
+
+    def __init__(self, client, weights, posts, category_slugs):
+        self.client = client
+        self.weights = weights
+        self.posts = posts
+        self.category_slugs = category_slugs
+
+    def __call__(self, rng):
+        action = rng.choices(list(self.weights), list(self.weights.values()))[0]
+        return action, getattr(self, action)(rng)
+
+    def browse(self, rng):
+        pk, slug = rng.choice(self.posts)
+        path = rng.choice((
+            reverse('blog:home'),
+            f"{reverse('blog:home')}?page={rng.randint(2, 20)}",
+            reverse('blog:post_detail', kwargs={'slug': slug}),
+            reverse('blog:post_by_category', kwargs={'slug': rng.choice(self.category_slugs)}),
+        ))
+        return lambda: self.client.request(path)
+
+    def search(self, rng):
+        path = f"{reverse('blog:post_search')}?query={rng.choice(WORDS)}"
+        return lambda: self.client.request(path)
+
+    def vote(self, rng):
+        pk, slug = rng.choice(self.posts)
+        data = {'post_id': pk, 'value': rng.choice((1, -1))}
+        return lambda: self.client.request(reverse('blog:rating'), 'POST', data,
+                                           {'X-Requested-With': 'XMLHttpRequest'})
+
+    def comment(self, rng):
+        pk, slug = rng.choice(self.posts)
+        data = {'content': ' '.join(rng.choices(WORDS, k=10)), 'parent': ''}
+        return lambda: self.client.request(reverse('blog:comment_create_view', kwargs={'pk': pk}), 'POST', data,
+                                           {'X-Requested-With': 'XMLHttpRequest'})
+
+
+class Command(LoadTestCommand):
+    """
+    Сценарный нагрузочный тест на данных generate_dataset: анонимный просмотр, поиск,
+    голосование и комментирование от имени пользователей <prefix>_<N>.
+    Сервер должен работать с той же базой данных, из которой берутся записи и логины:
+        python manage.py loadtest_scenario --base-url http://127.0.0.1:8000 --users 50 --logged-in 20
+    """
+    help = 'Сценарный нагрузочный тест (просмотр, поиск, оценки, комментарии) с перцентилями задержек по действиям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=20, help='Количество виртуальных пользователей (потоков)')
+        parser.add_argument('--logged-in', type=int, default=10, help='Сколько из них авторизованы')
+        parser.add_argument('--iterations', type=int, default=50, help='Действий на одного пользователя')
+        parser.add_argument('--mix', default='browse=60,search=20,vote=15,comment=5',
+                            help='Веса действий авторизованных пользователей')
+        parser.add_argument('--prefix', default='synthetic')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        weights = {name: float(weight) for name, weight in
+                   (item.split('=') for item in options['mix'].split(','))}
+        anonymous_weights = {name: weights.get(name, 0) for name in ('browse', 'search')}
+        posts = Post.custom.published().order_by('-create').values_list('pk', 'slug')
+        posts = list(posts.filter(slug__startswith=f"{options['prefix']}-post-")[:1000]) or list(posts[:1000])
+        category_slugs = list(Category.objects.values_list('slug', flat=True))
+        usernames = list(User.objects.filter(username__startswith=f"{options['prefix']}_")
+                         .values_list('username', flat=True)[:options['logged_in']])
+
+        virtual_users = []
+        for index in range(options['users']):
+            client = SessionClient(options['base_url'])
+            if index < len(usernames):
+                client.login(reverse('accounts:login'), usernames[index], options['password'])
+                virtual_users.append(VirtualUser(client, weights, posts, category_slugs))
+            else:
+                virtual_users.append(VirtualUser(client, anonymous_weights, posts, category_slugs))
+
+        results = run_scenario(virtual_users, options['iterations'], options['seed'])
+        for result in results.values():
+            self.write_row(result.as_row())
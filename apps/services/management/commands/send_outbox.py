@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.services.mail import deliver_outbox
+
+
+class Command(BaseCommand):
+    """
+    Фоновая отправка писем из очереди OutboxEmail.
+    Без --loop отправляет все готовые к отправке письма и завершается (для cron),
+    с --loop работает постоянно как воркер.
+    """
+    help = 'Отправка писем из очереди пачками с повторными попытками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Писем за одно SMTP-соединение')
+        parser.add_argument('--loop', action='store_true', help='Работать постоянно')
+        parser.add_argument('--interval', type=float, default=5, help='Пауза между проверками очереди (секунды)')
+
+    def handle(self, *args, **options):
+        while True:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = deliver_outbox(options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if not sent and not failed:
+                    break
+
+            if total_sent or total_failed:
+                self.stdout.write(f'Отправлено писем: {total_sent}, ошибок: {total_failed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
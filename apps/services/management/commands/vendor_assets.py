@@ -0,0 +1,32 @@
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.services.templatetags.assets import vendor_path
+
+
+class Command(BaseCommand):
+    """
+    Скачивание сторонних библиотек (VENDOR_ASSETS) с закрепленными версиями в static/vendor/.
+    После этого VENDOR_ASSETS_LOCAL=True подключает локальные копии, и они проходят через
+    collectstatic вместе со статикой проекта (хэши в именах, сжатые копии):
+        python manage.py vendor_assets && python manage.py collectstatic
+    """
+    help = 'Скачивание сторонних JS/CSS библиотек в static/vendor/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Скачать заново уже сохраненные файлы')
+
+    def handle(self, *args, **options):
+        target = Path(settings.STATICFILES_DIRS[0])
+        for name, url in settings.VENDOR_ASSETS.items():
+            path = target / vendor_path(url)
+            if path.exists() and not options['force']:
+                self.stdout.write(f'{name}: уже сохранен в {path}')
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with urllib.request.urlopen(url, timeout=30) as response:
+                path.write_bytes(response.read())
+            self.stdout.write(f'{name}: {url} -> {path}')
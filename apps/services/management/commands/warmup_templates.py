@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.template_tools import warmup_templates
+
+
+class Command(BaseCommand):
+    """
+    Компиляция всех шаблонов с отчетом о времени разбора (самые медленные первыми)
+    """
+    help = 'Предварительная компиляция шаблонов и отчет о времени разбора'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Сколько самых медленных шаблонов показать')
+
+    def handle(self, *args, **options):
+        results = warmup_templates()
+        errors = [(name, error) for name, _duration, error in results if error]
+
+        for name, duration, _error in sorted(results, key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f'{duration * 1000:8.2f} мс  {name}')
+        for name, error in errors:
+            self.stderr.write(f'Ошибка в шаблоне {name}: {error}')
+
+        total = sum(duration for _name, duration, _error in results)
+        self.stdout.write(f'Скомпилировано шаблонов: {len(results) - len(errors)}, за {total * 1000:.1f} мс')
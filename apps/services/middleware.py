@@ -0,0 +1,124 @@
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+from .performance import (RequestMetrics, collect_request_metrics, install_context_processor_timing,
+                          server_timing_header, stats)
+from .routers import _read_from_replica
+from .template_tools import collect_render_timings, install_render_timing
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Включает чтение с реплик для представлений с use_read_replica = True.
+    После успешного изменяющего запроса пользователь на REPLICA_PIN_SECONDS
+    закрепляется за основной базой (cookie), чтобы видеть собственные изменения.
+    """
+    pin_cookie_name = 'db_pin_primary'
+
+    def process_request(self, request):
+        # Сбрасываем состояние, оставшееся в потоке после запроса, завершившегося исключением
+        _read_from_replica.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and getattr(view_class, 'use_read_replica', False)
+                and self.pin_cookie_name not in request.COOKIES):
+            request.reads_from_replica = True
+            _read_from_replica.set(True)
+
+    def process_response(self, request, response):
+        if getattr(request, 'reads_from_replica', False):
+            _read_from_replica.set(False)
+
+        if (settings.DATABASE_REPLICAS
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(self.pin_cookie_name, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Замер стоимости запроса: количество и время SQL-запросов, время рендеринга шаблонов
+    и контекстных процессоров. Результат копится по имени представления для /services/performance/stats/
+    и при PERFORMANCE_SERVER_TIMING отдается в заголовке Server-Timing.
+    Измеряется доля запросов PERFORMANCE_SAMPLE_RATE, остальные проходят без накладных расходов.
+    Поддерживает sync и async цепочки, чтобы под ASGI не переводить асинхронные представления в поток.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        metrics = self.start()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, metrics)
+            stack.enter_context(collect_request_metrics(metrics))
+            timings = stack.enter_context(collect_render_timings())
+            response = self.get_response(request)
+        return self.finish(request, response, metrics, timings, started)
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+
+        metrics = self.start()
+        started = time.perf_counter()
+        # Соединения с базой локальны для потока: обертки ставятся в том же потоке,
+        # где sync_to_async(thread_sensitive=True) выполняет запросы этого HTTP-запроса
+        connections_stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(connections_stack, metrics)
+        try:
+            with collect_request_metrics(metrics), collect_render_timings() as timings:
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(connections_stack.close)()
+        return self.finish(request, response, metrics, timings, started)
+
+    @staticmethod
+    def is_sampled():
+        return settings.PERFORMANCE_MONITORING and random.random() < settings.PERFORMANCE_SAMPLE_RATE
+
+    @staticmethod
+    def start():
+        install_render_timing()
+        install_context_processor_timing()
+        return RequestMetrics()
+
+    @staticmethod
+    def wrap_connections(stack, metrics):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(metrics))
+
+    @staticmethod
+    def finish(request, response, metrics, timings, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        template_ms = timings.total * 1000
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        stats.add(view_name, (total_ms, metrics.sql_time * 1000, metrics.queries, template_ms,
+                              metrics.context_processor_time * 1000))
+        if settings.PERFORMANCE_SERVER_TIMING:
+            response['Server-Timing'] = server_timing_header(total_ms, metrics, template_ms)
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-19 13:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=998, verbose_name='Тема')),
+                ('body', models.TextField(verbose_name='Текст письма')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Отправитель')),
+                ('to', models.JSONField(default=list, verbose_name='Получатели')),
+                ('cc', models.JSONField(blank=True, default=list, verbose_name='Копия')),
+                ('bcc', models.JSONField(blank=True, default=list, verbose_name='Скрытая копия')),
+                ('reply_to', models.JSONField(blank=True, default=list, verbose_name='Ответить на')),
+                ('headers', models.JSONField(blank=True, default=dict, verbose_name='Заголовки')),
+                ('alternatives', models.JSONField(blank=True, default=list, verbose_name='Альтернативные версии')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('sent', 'Отправлено'), ('failed', 'Ошибка отправки')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('time_create', models.DateTimeField(auto_now_add=True, verbose_name='Время добавления')),
+                ('time_sent', models.DateTimeField(blank=True, null=True, verbose_name='Время отправки')),
+            ],
+            options={
+                'verbose_name': 'Исходящее письмо',
+                'verbose_name_plural': 'Исходящие письма',
+                'ordering': ('time_create',),
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='services_ou_status_0d5231_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,16 @@
+from hashlib import md5
+
+from django.conf import settings
 from django.contrib.auth.mixins import AccessMixin
+from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .page_cache import new_shell, page_cache_key, personalize
 
 
 class AuthorRequiredMixin(AccessMixin):
@@ -12,4 +22,106 @@ class AuthorRequiredMixin(AccessMixin):
             if not (request.user == self.get_object().author or request.user.is_staff):
                 messages.info(request, 'Изменение статьи доступно только автору!')
                 return redirect('blog:home')
-        return super().dispatch(request, *args, **kwargs)
\ No newline at end of file
+        return super().dispatch(request, *args, **kwargs)
+
+
+class ReadReplicaMixin:
+    """
+    Помечает представление как доступное только для чтения:
+    ReplicaRoutingMiddleware направит его запросы на реплики базы данных.
+    """
+    use_read_replica = True
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    Асинхронный аналог LoginRequiredMixin для представлений с async-обработчиками.
+    Пользователь загружается через request.auser(), без синхронных запросов к базе данных.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+    def handle_no_permission(self):
+        if self.raise_exception:
+            raise PermissionDenied(self.get_permission_denied_message())
+        return redirect_to_login(self.request.get_full_path(), self.get_login_url(), self.get_redirect_field_name())
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET (ETag): если страница не изменилась с прошлого визита,
+    возвращается 304 Not Modified без выборки данных и рендеринга шаблона.
+
+    Представление реализует get_validators(), возвращающий версию страницы,
+    рассчитанную одним запросом к базе данных, или None, если проверку нужно пропустить.
+    ETag слабый и учитывает пользователя, так как страница содержит персональные данные.
+    Last-Modified не отдается: он одинаков для всех пользователей, и If-Modified-Since
+    после входа, выхода или смены пользователя вернул бы 304 на чужую страницу.
+    """
+
+    def get_validators(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        # Одноразовые сообщения выводятся на странице, такой ответ нельзя заменять сохраненной копией
+        if not settings.CONDITIONAL_GET or messages.get_messages(request):
+            return super().get(request, *args, **kwargs)
+        version = self.get_validators()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+
+        self.page_version = version
+        etag = 'W/"%s"' % md5(f'{request.user.pk}:{version}'.encode()).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response.headers.setdefault('ETag', etag)
+        # Браузер хранит копию, но каждый раз сверяет ее с сервером
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SharedPageCacheMixin:
+    """
+    Общий для всех пользователей кэш страницы (PAGE_CACHE). Страница рендерится один раз как оболочка:
+    персональные фрагменты ({% personal %}) заменяются метками и заполняются для каждого запроса,
+    поэтому из кэша обслуживаются и авторизованные пользователи.
+
+    Ключ кэша включает версию данных страницы (page_version), которую рассчитывает ConditionalGetMixin,
+    поэтому новые записи, комментарии и оценки сразу дают новый ключ. Без версии страница не кэшируется.
+    Заголовки ответа (Cache-Control, Vary, Content-Language и т.п.) сохраняются вместе с оболочкой,
+    кроме заголовков, относящихся к конкретному ответу (shell_excluded_headers).
+    """
+    page_shell = None
+    shell_excluded_headers = ('Content-Type', 'Content-Length', 'Set-Cookie')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_shell'] = self.page_shell
+        return context
+
+    def get(self, request, *args, **kwargs):
+        version = getattr(self, 'page_version', None)
+        if not settings.PAGE_CACHE or version is None:
+            return super().get(request, *args, **kwargs)
+
+        key = page_cache_key(request, version)
+        shell = cache.get(key)
+        if shell is None:
+            self.page_shell = new_shell()
+            response = super().get(request, *args, **kwargs)
+            response.render()
+            if response.status_code != 200:
+                return response
+            headers = {name: value for name, value in response.headers.items()
+                       if name not in self.shell_excluded_headers}
+            shell = {**self.page_shell, 'content': response.content.decode(response.charset),
+                     'content_type': response['Content-Type'], 'headers': headers}
+            cache.set(key, shell, settings.PAGE_CACHE_TIMEOUT)
+        return HttpResponse(personalize(shell, request), content_type=shell['content_type'],
+                            headers=shell.get('headers'))
@@ -0,0 +1,77 @@
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """
+    Очередь исходящих писем: письма сохраняются в базу и отправляются фоновым обработчиком
+    """
+    STATUS_OPTIONS = (
+        ('pending', 'В очереди'),
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка отправки'),
+    )
+
+    subject = models.CharField(verbose_name='Тема', max_length=998)
+    body = models.TextField(verbose_name='Текст письма')
+    from_email = models.CharField(verbose_name='Отправитель', max_length=254, blank=True)
+    to = models.JSONField(verbose_name='Получатели', default=list)
+    cc = models.JSONField(verbose_name='Копия', default=list, blank=True)
+    bcc = models.JSONField(verbose_name='Скрытая копия', default=list, blank=True)
+    reply_to = models.JSONField(verbose_name='Ответить на', default=list, blank=True)
+    headers = models.JSONField(verbose_name='Заголовки', default=dict, blank=True)
+    alternatives = models.JSONField(verbose_name='Альтернативные версии', default=list, blank=True)
+    status = models.CharField(choices=STATUS_OPTIONS, default='pending', verbose_name='Статус', max_length=10)
+    attempts = models.PositiveIntegerField(verbose_name='Попыток отправки', default=0)
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    next_attempt_at = models.DateTimeField(verbose_name='Следующая попытка', default=timezone.now)
+    claimed_at = models.DateTimeField(verbose_name='Взято на отправку', null=True, blank=True)
+    time_create = models.DateTimeField(verbose_name='Время добавления', auto_now_add=True)
+    time_sent = models.DateTimeField(verbose_name='Время отправки', null=True, blank=True)
+
+    class Meta:
+        ordering = ('time_create',)
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.subject} → {", ".join(self.to)}'
+
+    @classmethod
+    def from_message(cls, message):
+        """
+        Создание записи очереди из EmailMessage (вложения не поддерживаются)
+        """
+        return cls(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email or '',
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            headers=dict(message.extra_headers),
+            alternatives=[[content, mimetype] for content, mimetype in getattr(message, 'alternatives', [])],
+        )
+
+    def to_message(self, connection=None):
+        """
+        Восстановление письма для отправки через переданное соединение
+        """
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email or None,
+            to=self.to,
+            cc=self.cc,
+            bcc=self.bcc,
+            reply_to=self.reply_to,
+            headers=self.headers,
+            connection=connection,
+        )
+        for content, mimetype in self.alternatives:
+            message.attach_alternative(content, mimetype)
+        return message
@@ -0,0 +1,43 @@
+import re
+import secrets
+from hashlib import md5
+
+from django.template.context_processors import csrf
+from django.template.loader import get_template
+
+
+def render_fragment(request, template_name, kwargs):
+    """
+    Персональный фрагмент страницы: рендерится без контекстных процессоров,
+    только с пользователем, запросом, CSRF-токеном и переданными аргументами
+    """
+    context = {'request': request, 'user': request.user, **csrf(request), **kwargs}
+    return get_template(template_name).render(context)
+
+
+def new_shell():
+    """
+    Заготовка общей оболочки страницы: метка фрагментов и список их шаблонов с аргументами
+    """
+    return {'nonce': secrets.token_hex(8), 'fragments': []}
+
+
+def fragment_marker(shell, template_name, kwargs):
+    shell['fragments'].append((template_name, kwargs))
+    return f'<!--personal:{shell["nonce"]}:{len(shell["fragments"]) - 1}-->'
+
+
+def personalize(shell, request):
+    """
+    Заполнение меток оболочки персональными фрагментами текущего пользователя
+    """
+    def replace(match):
+        template_name, kwargs = shell['fragments'][int(match.group(1))]
+        return render_fragment(request, template_name, kwargs)
+
+    return re.sub(rf'<!--personal:{shell["nonce"]}:(\d+)-->', replace, shell['content'])
+
+
+def page_cache_key(request, version):
+    key = f'{request.get_full_path()}:{getattr(request, "LANGUAGE_CODE", "")}:{version}'
+    return f'page_cache:{md5(key.encode()).hexdigest()}'
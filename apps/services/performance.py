@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.template import engines
+
+from .loadtest import percentile
+
+_current_metrics = ContextVar('performance_metrics', default=None)
+_context_processors_timed = False
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса. Экземпляр подключается к соединениям с базой данных
+    через connection.execute_wrapper() и считает количество и время SQL-запросов.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.context_processor_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+class collect_request_metrics:
+    """
+    Контекстный менеджер: делает метрики доступными обертке контекстных процессоров
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __enter__(self):
+        self._token = _current_metrics.set(self.metrics)
+        return self.metrics
+
+    def __exit__(self, *exc_info):
+        _current_metrics.reset(self._token)
+
+
+def _timed_context_processor(processor):
+    @wraps(processor)
+    def wrapper(request):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return processor(request)
+        started = time.perf_counter()
+        try:
+            return processor(request)
+        finally:
+            metrics.context_processor_time += time.perf_counter() - started
+    return wrapper
+
+
+def install_context_processor_timing():
+    """
+    Оборачивает контекстные процессоры движка шаблонов замером времени.
+    Ленивые значения (например, QuerySet) вычисляются при рендеринге и попадают во время шаблонов.
+    """
+    global _context_processors_timed
+    if not _context_processors_timed:
+        engine = engines['django'].engine
+        engine.template_context_processors = tuple(
+            _timed_context_processor(processor) for processor in engine.template_context_processors
+        )
+        _context_processors_timed = True
+
+
+class PerformanceStats:
+    """
+    Скользящее окно последних замеров по каждому представлению (в памяти процесса)
+    """
+    fields = ('total', 'sql', 'queries', 'template', 'context_processors')
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def add(self, view_name, sample):
+        with self._lock:
+            self._samples[view_name].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """
+        Сводка по представлениям: количество замеров, p50 и p95 каждой метрики (время в мс)
+        """
+        with self._lock:
+            samples = {view_name: list(values) for view_name, values in self._samples.items()}
+
+        result = {}
+        for view_name, values in sorted(samples.items()):
+            row = {'count': len(values)}
+            for index, field in enumerate(self.fields):
+                column = sorted(value[index] for value in values)
+                row[field] = {'p50': round(percentile(column, 50), 2), 'p95': round(percentile(column, 95), 2)}
+            result[view_name] = row
+        return result
+
+
+stats = PerformanceStats(settings.PERFORMANCE_STATS_WINDOW)
+
+
+def server_timing_header(total_ms, metrics, template_ms):
+    return ', '.join((
+        f'sql;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'tpl;dur={template_ms:.1f}',
+        f'cp;dur={metrics.context_processor_time * 1000:.1f}',
+        f'total;dur={total_ms:.1f}',
+    ))
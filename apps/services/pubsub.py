@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_broker = None
+
+
+class Subscription:
+    """
+    Подписка на канал: сообщения складываются в asyncio.Queue цикла событий подписчика
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        # Медленный клиент не должен задерживать остальных: при переполнении сообщение отбрасывается
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Pub/sub в памяти процесса. Подходит для одного ASGI-процесса и тестов;
+    при нескольких процессах нужен внешний брокер с тем же интерфейсом (PUBSUB_BROKER).
+    publish() можно вызывать из любого потока, в том числе из синхронного кода.
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+        return len(subscriptions)
+
+
+def get_broker():
+    """
+    Брокер, заданный настройкой PUBSUB_BROKER (один экземпляр на процесс)
+    """
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.PUBSUB_BROKER)()
+    return _broker
+
+
+def publish(channel, message):
+    return get_broker().publish(channel, message)
+
+
+def post_channel(post_id):
+    return f'post:{post_id}'
@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def clear_expired_sessions(model, batch_size=None, pause=0):
+    """
+    Удаление истекших сессий пачками по batch_size вместо одного DELETE на всю таблицу:
+    каждая пачка - короткая транзакция, которая не блокирует таблицу надолго.
+    Возвращает количество удаленных сессий.
+    """
+    batch_size = batch_size or settings.SESSION_CLEAR_BATCH_SIZE
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(model.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += model.objects.filter(pk__in=keys).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+class UnchangedSessionMixin:
+    """
+    Хранилище сессий, которое не перезаписывает сессию, если ее данные не изменились
+    с момента загрузки (modified выставляется при любом присваивании, даже того же значения).
+    При SESSION_SAVE_EVERY_REQUEST сессия сохраняется всегда, чтобы продлевать срок жизни.
+    """
+    _saved_state = None
+
+    def _dump(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._saved_state = self._dump(data)
+        return data
+
+    def is_unchanged(self):
+        return (not settings.SESSION_SAVE_EVERY_REQUEST and self.session_key is not None
+                and self._saved_state is not None
+                and self._saved_state == self._dump(self._get_session(no_load=True)))
+
+    def save(self, must_create=False):
+        if not must_create and self.is_unchanged():
+            return
+        super().save(must_create=must_create)
+        self._saved_state = self._dump(self._get_session(no_load=True))
+
+    @classmethod
+    def clear_expired(cls):
+        clear_expired_sessions(cls.get_model_class())
@@ -0,0 +1,10 @@
+from django.contrib.sessions.backends import cached_db
+
+from . import UnchangedSessionMixin
+
+
+class SessionStore(UnchangedSessionMixin, cached_db.SessionStore):
+    """
+    Сессии в кэше с записью в базу данных: чтение обычно обходится без запроса к django_session,
+    неизмененные данные не перезаписываются ни в кэше, ни в базе
+    """
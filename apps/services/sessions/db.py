@@ -0,0 +1,9 @@
+from django.contrib.sessions.backends import db
+
+from . import UnchangedSessionMixin
+
+
+class SessionStore(UnchangedSessionMixin, db.SessionStore):
+    """
+    Сессии в базе данных без повторной записи неизмененных данных
+    """
@@ -0,0 +1,77 @@
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+# Необязательные зависимости: без rjsmin бандлы только склеиваются, без brotli создаются лишь .gz
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def bundle_name(name):
+    return f'bundles/{name}.js'
+
+
+class PipelineStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статики для collectstatic (включается настройкой STATIC_PIPELINE):
+    - JS проекта склеивается и минифицируется в бандлы из STATIC_BUNDLES;
+    - все файлы получают хэш содержимого в имени (ManifestStaticFilesStorage);
+    - для текстовых файлов рядом сохраняются сжатые копии .gz и .br.
+
+    Имена с хэшем не меняются без изменения содержимого, поэтому веб-сервер может отдавать
+    их с кэшированием на год и готовыми сжатыми копиями, например в nginx:
+        location /static/ { gzip_static on; brotli_static on; expires 1y; add_header Cache-Control immutable; }
+    """
+    compress_extensions = ('.js', '.css', '.svg', '.json', '.txt', '.map', '.html')
+    compress_min_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name in self.build_bundles(paths):
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def build_bundles(self, paths):
+        for name, sources in settings.STATIC_BUNDLES.items():
+            parts = []
+            for source in sources:
+                storage, path = paths[source]
+                with storage.open(path) as file:
+                    parts.append(file.read().decode('utf-8'))
+            # Точка с запятой между файлами защищает от склейки выражений на стыке
+            content = ';\n'.join(parts)
+            if rjsmin is not None:
+                content = rjsmin.jsmin(content)
+            name = bundle_name(name)
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(content.encode('utf-8')))
+            yield name
+
+    def compress(self, name):
+        if not name.endswith(self.compress_extensions):
+            return
+        with self.open(name) as file:
+            content = file.read()
+        if len(content) < self.compress_min_size:
+            return
+        compressed = {f'{name}.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed[f'{name}.br'] = brotli.compress(content)
+        for compressed_name, data in compressed.items():
+            if len(data) >= len(content):
+                continue
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(data))
@@ -0,0 +1,107 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+_render_timings = ContextVar('template_render_timings', default=None)
+_original_render = None
+
+
+def iter_template_names(engine):
+    """
+    Имена всех шаблонов из каталогов, известных загрузчикам движка
+    """
+    seen = set()
+    for template_dir in engine.template_loaders[0].get_dirs():
+        for root, _dirs, files in os.walk(template_dir):
+            for file_name in files:
+                name = os.path.relpath(os.path.join(root, file_name), template_dir).replace(os.sep, '/')
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+def warmup_templates():
+    """
+    Предварительная компиляция всех шаблонов в кэш загрузчика cached.Loader.
+    Возвращает список (имя шаблона, время компиляции в секундах, ошибка или None).
+    """
+    engine = engines['django'].engine
+    results = []
+    for name in iter_template_names(engine):
+        started = time.perf_counter()
+        try:
+            engine.get_template(name)
+            error = None
+        except (TemplateSyntaxError, UnicodeDecodeError) as exc:
+            error = exc
+        results.append((name, time.perf_counter() - started, error))
+    return results
+
+
+class RenderTimings:
+    """
+    Замеры рендеринга шаблонов: entries - список (имя шаблона, секунды), время включает
+    вложенные include и extends; total - суммарное время шаблонов верхнего уровня.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.total = 0.0
+        self.depth = 0
+
+
+class collect_render_timings:
+    """
+    Контекстный менеджер: собирает время рендеринга шаблонов внутри блока
+    """
+
+    def __enter__(self):
+        self.timings = RenderTimings()
+        self._token = _render_timings.set(self.timings)
+        return self.timings
+
+    def __exit__(self, *exc_info):
+        _render_timings.reset(self._token)
+
+
+def _timed_render(self, context):
+    timings = _render_timings.get()
+    if timings is not None:
+        timings.depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        duration = time.perf_counter() - started
+        name = self.origin.template_name if self.origin else self.name
+        if timings is not None:
+            timings.depth -= 1
+            timings.entries.append((name, duration))
+            if not timings.depth:
+                timings.total += duration
+        if duration * 1000 >= settings.TEMPLATE_SLOW_RENDER_MS:
+            logger.warning('Медленный рендеринг шаблона %s: %.1f мс', name, duration * 1000)
+
+
+def install_render_timing():
+    """
+    Включение замера времени рендеринга каждого шаблона (включая include)
+    """
+    global _original_render
+    if _original_render is None:
+        _original_render = Template._render
+        Template._render = _timed_render
+
+
+def uninstall_render_timing():
+    global _original_render
+    if _original_render is not None:
+        Template._render = _original_render
+        _original_render = None
@@ -0,0 +1,37 @@
+from urllib.parse import urlsplit
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from apps.services.storage import bundle_name
+
+register = template.Library()
+
+
+def vendor_path(url):
+    """
+    Путь локальной копии сторонней библиотеки в статике (его же использует команда vendor_assets)
+    """
+    return 'vendor/' + urlsplit(url).path.lstrip('/')
+
+
+@register.simple_tag
+def js_bundle(name):
+    """
+    Скрипты бандла из STATIC_BUNDLES: при STATIC_PIPELINE - один собранный файл с хэшем в имени,
+    иначе исходные файлы по отдельности (удобно при разработке).
+    """
+    sources = [bundle_name(name)] if settings.STATIC_PIPELINE else settings.STATIC_BUNDLES[name]
+    return format_html_join('\n', '<script src="{}"></script>', ((static(source),) for source in sources))
+
+
+@register.simple_tag
+def vendor_url(name):
+    """
+    Адрес сторонней библиотеки из VENDOR_ASSETS: закрепленная версия на CDN
+    или локальная копия при VENDOR_ASSETS_LOCAL.
+    """
+    url = settings.VENDOR_ASSETS[name]
+    return static(vendor_path(url)) if settings.VENDOR_ASSETS_LOCAL else url
@@ -0,0 +1,23 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from apps.services.page_cache import fragment_marker
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal(context, template_name, **kwargs):
+    """
+    Персональная часть страницы (меню пользователя, CSRF-токен, кнопки автора).
+    Обычно фрагмент рендерится на месте, а при рендеринге общей оболочки страницы (SharedPageCacheMixin)
+    вместо него выводится метка, которая заполняется для каждого запроса отдельно.
+    Аргументы фрагмента сохраняются в кэше вместе с оболочкой, поэтому передаются простые значения.
+    """
+    shell = context.get('page_shell')
+    if shell:
+        return mark_safe(fragment_marker(shell, template_name, kwargs))
+    # Без оболочки фрагмент подключается как обычный include
+    fragment = context.template.engine.get_template(template_name)
+    with context.push(**kwargs):
+        return fragment.render(context)
@@ -0,0 +1,55 @@
+import time
+import warnings
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class PerformanceBudgetMixin:
+    """
+    Проверки бюджета производительности для TestCase: максимальное количество
+    SQL-запросов и время выполнения блока. Бюджет по количеству запросов не должен
+    зависеть от объема данных, поэтому N+1 сразу его превышает.
+    Время зависит от машины, поэтому его превышение - предупреждение, а ошибка теста
+    только при PERFORMANCE_TEST_DURATION (для стабильного окружения замеров).
+    """
+    render_budget = 1.0
+
+    def setUp(self):
+        super().setUp()
+        # Бюджеты рассчитаны на холодный кэш
+        cache.clear()
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > limit:
+            queries = '\n'.join(f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, 1))
+            self.fail(f'Выполнено {executed} запросов при бюджете {limit}:\n{queries}')
+
+    @contextmanager
+    def assertMaxDuration(self, seconds=None):
+        seconds = self.render_budget if seconds is None else seconds
+        started = time.perf_counter()
+        yield
+        duration = time.perf_counter() - started
+        if duration > seconds:
+            message = f'Выполнено за {duration:.3f} с при бюджете {seconds} с'
+            if settings.PERFORMANCE_TEST_DURATION:
+                self.fail(message)
+            warnings.warn(message, RuntimeWarning, stacklevel=3)
+
+
+def create_users(prefix, count):
+    """
+    Пользователи для наборов данных тестов производительности: логины prefix_0, prefix_1, ...,
+    профили создаются сигналом
+    """
+    return [get_user_model().objects.create_user(username=f'{prefix}_{index}', password='password123')
+            for index in range(count)]
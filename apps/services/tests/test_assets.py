@@ -0,0 +1,62 @@
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from apps.services.storage import PipelineStaticFilesStorage
+
+
+class AssetTagsTest(SimpleTestCase):
+    """
+    Тесты тегов подключения бандлов и сторонних библиотек
+    """
+
+    def render(self, source):
+        return Template('{% load assets %}' + source).render(Context())
+
+    @override_settings(STATIC_PIPELINE=False)
+    def test_bundle_sources_without_pipeline(self):
+        """Без сборки файлы бандла подключаются по отдельности."""
+        html = self.render("{% js_bundle 'post_detail' %}")
+        self.assertEqual(html.count('<script'), 2)
+        self.assertIn('/static/js/comments.js', html)
+
+    @override_settings(STATIC_PIPELINE=True)
+    def test_bundle_file_with_pipeline(self):
+        """Со сборкой подключается один собранный файл."""
+        html = self.render("{% js_bundle 'post_detail' %}")
+        self.assertEqual(html, '<script src="/static/bundles/post_detail.js"></script>')
+
+    def test_vendor_url(self):
+        """Сторонние библиотеки берутся с CDN с закрепленной версией или из локальной копии."""
+        with override_settings(VENDOR_ASSETS_LOCAL=False):
+            self.assertEqual(self.render("{% vendor_url 'jquery' %}"), 'https://code.jquery.com/jquery-3.7.1.min.js')
+        with override_settings(VENDOR_ASSETS_LOCAL=True):
+            self.assertEqual(self.render("{% vendor_url 'flatpickr_js' %}"),
+                             '/static/vendor/npm/flatpickr%404.6.13/dist/flatpickr.min.js')
+
+
+class PipelineStaticFilesStorageTest(SimpleTestCase):
+    """
+    Тест сборки статики через collectstatic
+    """
+
+    def test_collectstatic_builds_hashed_bundles_and_compressed_copies(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(
+                STATIC_ROOT=static_root,
+                STORAGES={'staticfiles': {'BACKEND': 'apps.services.storage.PipelineStaticFilesStorage'}},
+                STATIC_BUNDLES={'post_detail': ('js/ratings.js', 'js/comments.js')}):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+            manifest = json.loads((Path(static_root) / PipelineStaticFilesStorage.manifest_name).read_text())
+            hashed_name = manifest['paths']['bundles/post_detail.js']
+            self.assertRegex(hashed_name, r'^bundles/post_detail\.[0-9a-f]{12}\.js$')
+
+            bundle = (Path(static_root) / hashed_name).read_bytes()
+            self.assertIn(b'commentForm', bundle)
+            self.assertIn(b'rating-sum', bundle)
+            self.assertEqual(gzip.decompress((Path(static_root) / f'{hashed_name}.gz').read_bytes()), bundle)
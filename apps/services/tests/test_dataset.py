@@ -0,0 +1,82 @@
+import random
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.accounts.models import Profile
+from apps.blog.models import Comment, Post, Rating
+from apps.services.dataset import DatasetGenerator, build_comment_forest
+
+
+class CommentForestTest(TestCase):
+    """
+    Тесты расчета полей MPTT для синтетических деревьев комментариев
+    """
+
+    def test_nested_sets_are_consistent(self):
+        """Границы lft/rght каждого дерева образуют непрерывную вложенную последовательность."""
+        nodes = build_comment_forest(200, max_depth=6, rng=random.Random(1))
+        for tree in {node['tree'] for node in nodes}:
+            tree_nodes = [node for node in nodes if node['tree'] == tree]
+            bounds = sorted(value for node in tree_nodes for value in (node['lft'], node['rght']))
+            self.assertEqual(bounds, list(range(1, len(tree_nodes) * 2 + 1)))
+        self.assertLessEqual(max(node['level'] for node in nodes), 5)
+
+    def test_children_are_inside_parent_bounds(self):
+        """Ответ лежит внутри границ родителя и на уровень глубже."""
+        nodes = build_comment_forest(100, max_depth=10, rng=random.Random(2))
+        for node in nodes:
+            if node['parent'] is not None:
+                parent = nodes[node['parent']]
+                self.assertTrue(parent['lft'] < node['lft'] < node['rght'] < parent['rght'])
+                self.assertEqual(node['level'], parent['level'] + 1)
+
+    def test_sibling_order(self):
+        """Соседние ответы идут от новых к старым, в режиме добавления в конец - в порядке создания."""
+        for newest_first in (True, False):
+            nodes = build_comment_forest(100, max_depth=3, rng=random.Random(4), newest_first=newest_first)
+            siblings = {}
+            for index, node in enumerate(nodes):
+                if node['parent'] is not None:
+                    siblings.setdefault(node['parent'], []).append((node['lft'], index))
+            for group in siblings.values():
+                indexes = [index for lft, index in sorted(group)]
+                self.assertEqual(indexes, sorted(indexes, reverse=newest_first))
+
+
+class DatasetGeneratorTest(TestCase):
+    """
+    Тесты генератора синтетических данных
+    """
+
+    def generate(self):
+        generator = DatasetGenerator(prefix='test', batch_size=50, seed=3)
+        user_ids = generator.create_users(10)
+        category_ids = generator.create_categories(2)
+        post_ids = generator.create_posts(20, user_ids, category_ids)
+        generator.create_comments(150, post_ids, user_ids, max_depth=5)
+        generator.create_ratings(100, post_ids, user_ids)
+        return user_ids, post_ids
+
+    def assertMatchesRebuild(self):
+        fields = ('pk', 'tree_id', 'lft', 'rght', 'level', 'parent_id')
+        generated = list(Comment.objects.order_by('pk').values_list(*fields))
+        Comment.objects.rebuild()
+        self.assertEqual(generated, list(Comment.objects.order_by('pk').values_list(*fields)))
+
+    def test_generated_dataset_matches_mptt_rebuild(self):
+        """Созданные через bulk_create деревья совпадают с результатом Comment.objects.rebuild()."""
+        user_ids, post_ids = self.generate()
+        self.assertEqual(Profile.objects.filter(user_id__in=user_ids).count(), 10)
+        self.assertEqual(Post.objects.filter(pk__in=post_ids).count(), 20)
+        self.assertTrue(90 <= Rating.objects.count() <= 100)
+        # Новые деревья идут первыми: первый tree_id у последнего созданного корня
+        self.assertEqual(Comment.objects.filter(parent=None).latest('pk').tree_id, 1)
+        self.assertMatchesRebuild()
+
+    def test_append_only_trees_keep_creation_order(self):
+        """В режиме COMMENTS_APPEND_ONLY деревья и ответы идут в порядке создания."""
+        with mock.patch.object(Comment._mptt_meta, 'order_insertion_by', []):
+            self.generate()
+            self.assertEqual(Comment.objects.filter(parent=None).earliest('pk').tree_id, 1)
+            self.assertMatchesRebuild()
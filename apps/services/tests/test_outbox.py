@@ -0,0 +1,131 @@
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.log import AdminEmailHandler
+
+from apps.services.mail import deliver_outbox
+from apps.services.models import OutboxEmail
+
+User = get_user_model()
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """
+    Бэкенд, имитирующий сбой SMTP-сервера
+    """
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class StatusRecordingEmailBackend(BaseEmailBackend):
+    """
+    Бэкенд, запоминающий статусы писем в базе в момент отправки
+    """
+    statuses = []
+
+    def send_messages(self, email_messages):
+        self.statuses.append(sorted(OutboxEmail.objects.values_list('status', flat=True)))
+        return len(email_messages)
+
+
+@override_settings(EMAIL_BACKEND='apps.services.mail.OutboxEmailBackend',
+                   OUTBOX_EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+                   OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+class OutboxTest(TestCase):
+    """
+    Тесты очереди исходящих писем
+    """
+
+    def setUp(self):
+        self.email_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.email_dir.cleanup)
+        User.objects.create_user(username='outbox_user', email='outbox@example.com', password='password123')
+
+    def test_password_reset_email_is_queued(self):
+        """Письмо сброса пароля попадает в очередь, а не отправляется в запросе."""
+        response = self.client.post(reverse('accounts:password_reset'), {'email': 'outbox@example.com'})
+        self.assertRedirects(response, reverse('accounts:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ['outbox@example.com'])
+        self.assertEqual(email.status, 'pending')
+
+    def test_worker_sends_queued_emails_through_file_backend(self):
+        """Воркер отправляет письма пачкой через настроенный бэкенд."""
+        mail.send_mail('Тема 1', 'Текст', 'site@example.com', ['a@example.com'])
+        mail.send_mail('Тема 2', 'Текст', 'site@example.com', ['b@example.com'])
+
+        with self.settings(EMAIL_FILE_PATH=self.email_dir.name):
+            sent, failed = deliver_outbox()
+
+        self.assertEqual((sent, failed), (2, 0))
+        self.assertFalse(OutboxEmail.objects.exclude(status='sent').exists())
+        # Одно соединение файлового бэкенда - один файл на всю пачку
+        self.assertEqual(len(os.listdir(self.email_dir.name)), 1)
+
+    def test_emails_are_claimed_before_sending(self):
+        """Письма помечаются sending до отправки, результат сохраняется по каждому письму."""
+        mail.send_mail('Тема 1', 'Текст', 'site@example.com', ['a@example.com'])
+        mail.send_mail('Тема 2', 'Текст', 'site@example.com', ['b@example.com'])
+        StatusRecordingEmailBackend.statuses = []
+
+        with self.settings(OUTBOX_EMAIL_BACKEND='apps.services.tests.test_outbox.StatusRecordingEmailBackend'):
+            self.assertEqual(deliver_outbox(), (2, 0))
+
+        self.assertEqual(StatusRecordingEmailBackend.statuses, [['sending', 'sending'], ['sending', 'sent']])
+        # Взятые на отправку письма другой воркер не выбирает
+        OutboxEmail.objects.update(status='sending', claimed_at=timezone.now())
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    @override_settings(OUTBOX_CLAIM_TIMEOUT=60)
+    def test_stale_claim_is_retried(self):
+        """Письмо, зависшее в статусе sending дольше OUTBOX_CLAIM_TIMEOUT, отправляется повторно."""
+        mail.send_mail('Тема', 'Текст', 'site@example.com', ['a@example.com'])
+        OutboxEmail.objects.update(status='sending', claimed_at=timezone.now() - timedelta(seconds=120))
+
+        with self.settings(EMAIL_FILE_PATH=self.email_dir.name):
+            self.assertEqual(deliver_outbox(), (1, 0))
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        """Неудачная отправка откладывается, после исчерпания попыток письмо помечается ошибочным."""
+        mail.send_mail('Тема', 'Текст', 'site@example.com', ['a@example.com'])
+
+        with self.settings(OUTBOX_EMAIL_BACKEND='apps.services.tests.test_outbox.FailingEmailBackend'):
+            self.assertEqual(deliver_outbox(), (0, 1))
+            email = OutboxEmail.objects.get()
+            self.assertEqual(email.status, 'pending')
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=30))
+
+            # До наступления времени повтора письмо не выбирается
+            self.assertEqual(deliver_outbox(), (0, 0))
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_outbox(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'failed')
+        self.assertEqual(email.attempts, 2)
+        self.assertIn('SMTP недоступен', email.last_error)
+
+
+class AdminErrorEmailTest(SimpleTestCase):
+    """
+    Тесты отправки писем об ошибках администраторам
+    """
+
+    def test_admin_error_emails_bypass_outbox(self):
+        """Обработчик mail_admins отправляет письма через OUTBOX_EMAIL_BACKEND, а не через очередь."""
+        handler = next(handler for handler in logging.getLogger('django').handlers
+                       if isinstance(handler, AdminEmailHandler))
+        self.assertEqual(handler.email_backend, settings.OUTBOX_EMAIL_BACKEND)
@@ -0,0 +1,192 @@
+import copy
+import time
+from unittest import skipUnless
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve, reverse
+
+from apps.services.middleware import PerformanceMiddleware
+from apps.services.performance import PerformanceStats, stats
+from apps.services.testing import PerformanceBudgetMixin
+
+
+@override_settings(PERFORMANCE_MONITORING=True, PERFORMANCE_SAMPLE_RATE=1, PERFORMANCE_SERVER_TIMING=True)
+class PerformanceMiddlewareTest(TestCase):
+    """
+    Тесты замеров PerformanceMiddleware и сводки по представлениям
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user(username='staff', password='password123', is_staff=True)
+        cls.user = get_user_model().objects.create_user(username='user', password='password123')
+
+    def setUp(self):
+        stats.clear()
+
+    def test_server_timing_header(self):
+        """Ответ содержит заголовок Server-Timing с SQL, шаблонами и контекстными процессорами."""
+        response = self.client.get(reverse('blog:home'))
+        header = response['Server-Timing']
+        for metric in ('sql;dur=', 'queries"', 'tpl;dur=', 'cp;dur=', 'total;dur='):
+            self.assertIn(metric, header)
+
+    def test_samples_are_grouped_by_view_name(self):
+        """Замеры копятся по имени представления."""
+        self.client.get(reverse('blog:home'))
+        self.client.get(reverse('blog:home'))
+        summary = stats.summary()
+        self.assertEqual(summary['blog:home']['count'], 2)
+        self.assertGreater(summary['blog:home']['queries']['p50'], 0)
+        self.assertGreater(summary['blog:home']['template']['p95'], 0)
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        """При нулевой доле выборки запросы не измеряются."""
+        response = self.client.get(reverse('blog:home'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(stats.summary(), {})
+
+    @override_settings(PERFORMANCE_MONITORING=False)
+    def test_disabled_monitoring(self):
+        """Без PERFORMANCE_MONITORING заголовок не добавляется."""
+        response = self.client.get(reverse('blog:home'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Без PERFORMANCE_SERVER_TIMING замеры копятся, но клиенту не отдаются."""
+        response = self.client.get(reverse('blog:home'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(stats.summary()['blog:home']['count'], 1)
+
+    async def test_async_chain(self):
+        """С асинхронным get_response middleware остается асинхронным и измеряет запрос."""
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get(reverse('blog:home'))
+        request.resolver_match = resolve(request.path)
+        response = await middleware(request)
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertEqual(stats.summary()['blog:home']['count'], 1)
+
+    def test_stats_endpoint_requires_staff(self):
+        """Сводка доступна только персоналу."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('services:performance_stats'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_stats_endpoint_returns_summary(self):
+        """Персонал получает p50/p95 по представлениям."""
+        self.client.get(reverse('blog:home'))
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('services:performance_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['views']['blog:home']['sql']), {'p50', 'p95'})
+
+
+class PerformanceStatsTest(TestCase):
+    """
+    Тесты скользящего окна замеров
+    """
+
+    def test_window_keeps_latest_samples(self):
+        """В окне остаются только последние замеры."""
+        window = PerformanceStats(window=2)
+        for total in (100, 1, 2):
+            window.add('view', (total, 0, 0, 0, 0))
+        row = window.summary()['view']
+        self.assertEqual(row['count'], 2)
+        self.assertEqual(row['total'], {'p50': 1, 'p95': 2})
+
+
+class PerformanceBudgetMixinTest(PerformanceBudgetMixin, SimpleTestCase):
+    """
+    Тесты бюджета времени: по умолчанию превышение - предупреждение
+    """
+
+    def test_duration_overrun_warns(self):
+        """Превышение бюджета времени по умолчанию - предупреждение."""
+        with self.assertWarns(RuntimeWarning):
+            with self.assertMaxDuration(0):
+                time.sleep(0.01)
+
+    @override_settings(PERFORMANCE_TEST_DURATION=True)
+    def test_duration_overrun_fails_when_enforced(self):
+        """С PERFORMANCE_TEST_DURATION превышение времени - ошибка теста."""
+        with self.assertRaises(self.failureException):
+            with self.assertMaxDuration(0):
+                time.sleep(0.01)
+
+
+class ConnectionReuseTest(TransactionTestCase):
+    """
+    Соединения с базой за серию запросов главной страницы (PostListView): без постоянных соединений
+    каждый запрос открывает новое, с DB_CONN_MAX_AGE или пулом (DB_POOL) соединение переиспользуется.
+    SQLite в памяти не закрывает соединение между запросами, на нем тесты пропускаются.
+    """
+    requests = 5
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite в памяти не закрывает соединение между запросами.')
+        self.settings_dict = copy.deepcopy(connection.settings_dict)
+        connection.close()
+
+    def tearDown(self):
+        connection.close()
+        if connection.vendor == 'postgresql':
+            connection.close_pool()
+        connection.settings_dict.update(self.settings_dict)
+
+    def serve(self):
+        """Серия запросов с закрытием устаревших соединений после ответа, как у сервера приложений"""
+        opened = []
+        server_connections = set()
+
+        def on_connection_created(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(on_connection_created)
+        try:
+            for _ in range(self.requests):
+                self.assertEqual(self.client.get(reverse('blog:home')).status_code, 200)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT pg_backend_pid()')
+                        server_connections.add(cursor.fetchone()[0])
+                else:
+                    connection.ensure_connection()
+                close_old_connections()
+        finally:
+            connection_created.disconnect(on_connection_created)
+        return len(opened), len(server_connections)
+
+    def test_without_persistent_connections_every_request_connects(self):
+        """Без CONN_MAX_AGE и пула каждый запрос открывает новое соединение."""
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        self.assertEqual(self.serve()[0], self.requests)
+
+    def test_persistent_connection_is_reused(self):
+        """С CONN_MAX_AGE соединение открывается один раз на серию запросов."""
+        connection.settings_dict['CONN_MAX_AGE'] = 600
+        self.assertEqual(self.serve()[0], 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Пул соединений есть только у PostgreSQL.')
+    def test_pool_reuses_server_connections(self):
+        """С пулом запросы обслуживаются одним соединением сервера вместо соединения на запрос."""
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        self.assertEqual(self.serve()[1], self.requests)
+
+        connection.close()
+        connection.settings_dict['OPTIONS'] = {**self.settings_dict.get('OPTIONS', {}),
+                                               'pool': {'min_size': 1, 'max_size': 1}}
+        self.assertEqual(self.serve()[1], 1)
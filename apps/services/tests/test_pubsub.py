@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from apps.services.pubsub import LocalBroker, post_channel
+
+
+class LocalBrokerTest(SimpleTestCase):
+    """
+    Тесты pub/sub в памяти процесса
+    """
+
+    async def test_publish_delivers_to_channel_subscribers(self):
+        """Сообщение получают только подписчики своего канала."""
+        broker = LocalBroker()
+        first = broker.subscribe(post_channel(1))
+        second = broker.subscribe(post_channel(1))
+        other = broker.subscribe(post_channel(2))
+
+        self.assertEqual(broker.publish(post_channel(1), {'event': 'rating'}), 2)
+        self.assertEqual(await asyncio.wait_for(first.get(), 1), {'event': 'rating'})
+        self.assertEqual(await asyncio.wait_for(second.get(), 1), {'event': 'rating'})
+        self.assertTrue(other.queue.empty())
+
+    async def test_publish_from_another_thread(self):
+        """Публикация из синхронного кода в другом потоке доходит до подписчика."""
+        broker = LocalBroker()
+        subscription = broker.subscribe('channel')
+        thread = threading.Thread(target=broker.publish, args=('channel', {'event': 'comment'}))
+        thread.start()
+        thread.join()
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {'event': 'comment'})
+
+    async def test_closed_subscription_stops_receiving(self):
+        """После close() подписка не получает сообщений, пустой канал удаляется."""
+        broker = LocalBroker()
+        subscription = broker.subscribe('channel')
+        subscription.close()
+        self.assertEqual(broker.publish('channel', {'event': 'comment'}), 0)
+        self.assertNotIn('channel', broker._subscriptions)
+
+    async def test_full_queue_drops_messages(self):
+        """Переполненная очередь медленного клиента отбрасывает новые сообщения."""
+        broker = LocalBroker()
+        broker.queue_size = 2
+        subscription = broker.subscribe('channel')
+        for index in range(5):
+            broker.publish('channel', {'index': index})
+        await asyncio.sleep(0)
+        self.assertEqual(subscription.queue.qsize(), 2)
+        self.assertEqual((await subscription.get())['index'], 0)
@@ -0,0 +1,84 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.blog.models import Post
+from apps.blog.views import PostListView, RatingCreateView
+from apps.services.middleware import ReplicaRoutingMiddleware
+from apps.services.routers import PrimaryReplicaRouter, read_from_replica
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    """
+    Тесты маршрутизации запросов между основной базой и репликами
+    """
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self):
+        """Вне read_from_replica() чтение идет в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_go_to_replica_inside_context(self):
+        """Внутри read_from_replica() чтение идет на реплику."""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Post), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writes_always_go_to_primary(self):
+        """Запись всегда идет в основную базу."""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_go_to_primary(self):
+        """Без настроенных реплик чтение идет в основную базу."""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingMiddlewareTest(SimpleTestCase):
+    """
+    Тесты middleware, включающего чтение с реплик
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.used_databases = []
+
+    def get_response(self, request):
+        self.used_databases.append(self.router.db_for_read(Post))
+        return HttpResponse()
+
+    def process(self, request, view):
+        middleware = ReplicaRoutingMiddleware(self.get_response)
+        middleware.process_view(request, view, (), {})
+        response = self.get_response(request)
+        return middleware.process_response(request, response)
+
+    def test_read_only_view_uses_replica(self):
+        """Представление только для чтения читает с реплики, после ответа маршрутизация сбрасывается."""
+        self.process(self.factory.get('/'), PostListView.as_view())
+        self.assertEqual(self.used_databases, ['replica_1'])
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_other_views_use_primary(self):
+        """Представления без use_read_replica читают с основной базы."""
+        self.process(self.factory.get('/rating/'), RatingCreateView.as_view())
+        self.assertEqual(self.used_databases, ['default'])
+
+    def test_write_pins_user_to_primary(self):
+        """После успешной записи выставляется cookie закрепления за основной базой."""
+        response = self.process(self.factory.post('/rating/'), RatingCreateView.as_view())
+        cookie = response.cookies[ReplicaRoutingMiddleware.pin_cookie_name]
+        self.assertEqual(cookie['max-age'], 10)
+
+    def test_pinned_user_reads_from_primary(self):
+        """Закрепленный пользователь читает с основной базы даже на страницах только для чтения."""
+        request = self.factory.get('/')
+        request.COOKIES[ReplicaRoutingMiddleware.pin_cookie_name] = '1'
+        self.process(request, PostListView.as_view())
+        self.assertEqual(self.used_databases, ['default'])
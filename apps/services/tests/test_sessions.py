@@ -0,0 +1,115 @@
+import os
+import runpy
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.services.sessions import clear_expired_sessions
+from apps.services.sessions.cached_db import SessionStore as CachedDBStore
+from apps.services.sessions.db import SessionStore as DBStore
+from yoko_multigame_website import settings as project_settings
+
+
+class UnchangedSessionTest(TestCase):
+    """
+    Тесты хранилищ сессий, пропускающих запись неизмененных данных
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def create_session(self, store_class):
+        session = store_class()
+        session['theme'] = 'dark'
+        session.save()
+        return session.session_key
+
+    def test_unchanged_session_not_written(self):
+        for store_class in (DBStore, CachedDBStore):
+            with self.subTest(store=store_class.__module__):
+                session = store_class(self.create_session(store_class))
+                session.load()
+                session['theme'] = 'dark'
+                self.assertTrue(session.modified)
+                with self.assertNumQueries(0):
+                    session.save()
+
+    def test_changed_session_written(self):
+        session_key = self.create_session(DBStore)
+        session = DBStore(session_key)
+        session['theme'] = 'light'
+        session.save()
+        self.assertEqual(DBStore(session_key)['theme'], 'light')
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_save_every_request_always_writes(self):
+        session = DBStore(self.create_session(DBStore))
+        self.assertEqual(session['theme'], 'dark')
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertTrue(any(query['sql'].startswith('UPDATE') for query in queries))
+
+    def test_cycle_key_keeps_data(self):
+        session = DBStore(self.create_session(DBStore))
+        old_key = session.session_key
+        session.cycle_key()
+        self.assertNotEqual(session.session_key, old_key)
+        self.assertEqual(DBStore(session.session_key)['theme'], 'dark')
+        self.assertFalse(Session.objects.filter(pk=old_key).exists())
+
+
+class ClearExpiredSessionsTest(TestCase):
+    """
+    Тесты пакетной очистки истекших сессий
+    """
+
+    def setUp(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{index}', session_data='', expire_date=now - timedelta(days=1))
+             for index in range(5)]
+            + [Session(session_key='active', session_data='', expire_date=now + timedelta(days=1))]
+        )
+
+    def test_expired_deleted_in_batches(self):
+        # Три пачки на выборку и три на удаление, последняя выборка пустая
+        with self.assertNumQueries(7):
+            self.assertEqual(clear_expired_sessions(Session, batch_size=2), 5)
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), ['active'])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('clear_expired_sessions', '--batch-size', '3', stdout=out)
+        self.assertIn('5', out.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_clearsessions_uses_batches(self):
+        DBStore.clear_expired()
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class SessionBackendSettingTest(SimpleTestCase):
+    """
+    Тесты выбора хранилища сессий через SESSION_BACKEND
+    """
+
+    def test_unknown_backend_is_improperly_configured(self):
+        """Неизвестное значение - ошибка конфигурации со списком допустимых значений."""
+        with mock.patch.dict(os.environ, {'SESSION_BACKEND': 'redis'}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'db, cached_db, signed_cookies'):
+                runpy.run_path(project_settings.__file__)
+
+    def test_known_backend_selects_engine(self):
+        """Допустимое значение выбирает соответствующий SESSION_ENGINE."""
+        with mock.patch.dict(os.environ, {'SESSION_BACKEND': 'signed_cookies'}):
+            namespace = runpy.run_path(project_settings.__file__)
+        self.assertEqual(namespace['SESSION_ENGINE'], 'django.contrib.sessions.backends.signed_cookies')
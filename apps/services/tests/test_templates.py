@@ -0,0 +1,57 @@
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, override_settings
+
+from apps.services.template_tools import (collect_render_timings, install_render_timing,
+                                          uninstall_render_timing, warmup_templates)
+
+
+class WarmupTemplatesTest(SimpleTestCase):
+    """
+    Тесты предварительной компиляции шаблонов
+    """
+
+    def test_project_templates_are_compiled_into_cache(self):
+        """Все шаблоны проекта компилируются без ошибок и попадают в кэш загрузчика."""
+        results = warmup_templates()
+        names = {name for name, _duration, _error in results}
+        self.assertIn('main.html', names)
+        self.assertIn('blog/comments/comments_list.html', names)
+        self.assertFalse([name for name, _duration, error in results if error])
+
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertTrue(any('main.html' in key for key in loader.get_template_cache))
+
+
+@override_settings(TEMPLATE_SLOW_RENDER_MS=10000)
+class RenderTimingTest(SimpleTestCase):
+    """
+    Тесты замера времени рендеринга шаблонов
+    """
+
+    def setUp(self):
+        install_render_timing()
+        self.addCleanup(uninstall_render_timing)
+
+    def test_render_time_is_recorded_for_template(self):
+        """Время рендеринга записывается по имени шаблона."""
+        with collect_render_timings() as timings:
+            render_to_string('includes/messages.html', {})
+        self.assertEqual([name for name, _duration in timings.entries], ['includes/messages.html'])
+        self.assertEqual(timings.total, timings.entries[0][1])
+
+    def test_nested_templates_are_counted_once_in_total(self):
+        """Вложенные шаблоны попадают в замеры, но не удваивают общее время."""
+        with collect_render_timings() as timings:
+            render_to_string('errors/error_page.html', {'title': 'Ошибка'})
+        names = [name for name, _duration in timings.entries]
+        self.assertIn('includes/header.html', names)
+        self.assertIn('main.html', names)
+        self.assertEqual(timings.total, dict(timings.entries)['errors/error_page.html'])
+
+    def test_nothing_is_recorded_outside_collector(self):
+        """Вне collect_render_timings() замеры никуда не сохраняются."""
+        with collect_render_timings() as timings:
+            pass
+        render_to_string('includes/messages.html', {})
+        self.assertEqual(timings.entries, [])
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import PerformanceStatsView
+
+app_name = 'services'
+
+urlpatterns = [
+    path('performance/stats/', PerformanceStatsView.as_view(), name='performance_stats'),
+]
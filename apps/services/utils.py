@@ -18,4 +18,22 @@ def unique_slugify(instance, text_to_slugify):
     while queryset.filter(slug=unique_slug).exists():
         unique_slug = f"{base_slug}-{uuid4().hex[:8]}"
 
-    return unique_slug
\ No newline at end of file
+    return unique_slug
+
+
+def unique_slugify_many(model, texts):
+    """
+    Уникальные SLUG для пачки новых объектов (массовая загрузка): занятые SLUG загружаются одним запросом,
+    совпадения с базой и внутри пачки разрешаются в памяти так же, как в unique_slugify.
+    """
+    base_slugs = [slugify(text) for text in texts]
+    taken = set(model.objects.filter(slug__in=set(base_slugs)).values_list('slug', flat=True))
+
+    slugs = []
+    for base_slug in base_slugs:
+        unique_slug = base_slug
+        while unique_slug in taken:
+            unique_slug = f"{base_slug}-{uuid4().hex[:8]}"
+        taken.add(unique_slug)
+        slugs.append(unique_slug)
+    return slugs
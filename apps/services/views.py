@@ -0,0 +1,18 @@
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import JsonResponse
+from django.views import View
+
+from .performance import stats
+
+
+class PerformanceStatsView(UserPassesTestMixin, View):
+    """
+    Сводка замеров PerformanceMiddleware по представлениям (только для персонала).
+    Статистика хранится в памяти процесса: каждый воркер отдает свои замеры.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'views': stats.summary()}, json_dumps_params={'ensure_ascii': False})
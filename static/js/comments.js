@@ -95,6 +95,11 @@ document.addEventListener('DOMContentLoaded', function () {
                 tempDiv.innerHTML = data.comment_html.trim();
 
                 const newCommentNode = tempDiv.firstChild;
+                // Комментарий мог уже прийти через поток обновлений записи (post_events.js)
+                const existingNode = document.getElementById(newCommentNode.id);
+                if (existingNode) {
+                    existingNode.remove();
+                }
 
                 if (parentId) {
                     const parentRepliesContainer = document.querySelector(`#replies-${parentId}`);
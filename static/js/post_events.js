@@ -0,0 +1,39 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // Подписка на обновления записи (server-sent events): новые комментарии и сумма оценок
+    const commentsContainer = document.querySelector('.nested-comments[data-events-url]');
+    if (!commentsContainer || !window.EventSource) {
+        return;
+    }
+
+    const events = new EventSource(commentsContainer.dataset.eventsUrl);
+
+    events.addEventListener('comment', function (event) {
+        const data = JSON.parse(event.data);
+        // Свой комментарий уже добавлен на страницу после отправки формы
+        if (document.getElementById(`comment-node-${data.id}`)) {
+            return;
+        }
+
+        const tempDiv = document.createElement('div');
+        tempDiv.innerHTML = data.html.trim();
+        const newCommentNode = tempDiv.firstChild;
+
+        const parentRepliesContainer = data.parent_id ? document.querySelector(`#replies-${data.parent_id}`) : null;
+        if (parentRepliesContainer) {
+            parentRepliesContainer.appendChild(newCommentNode);
+            const countSpan = parentRepliesContainer.parentNode.querySelector('.toggle-replies-btn .replies-count');
+            if (countSpan) {
+                countSpan.textContent = parseInt(countSpan.textContent) + 1;
+            }
+        } else {
+            commentsContainer.prepend(newCommentNode);
+        }
+    });
+
+    events.addEventListener('rating', function (event) {
+        const data = JSON.parse(event.data);
+        document.querySelectorAll(`.rating-buttons[data-post-id="${data.post_id}"] .rating-sum`).forEach(element => {
+            element.textContent = data.rating_sum;
+        });
+    });
+});
@@ -44,20 +44,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    var $initialCityValueElement = $('#city_initial_value');
-    if ($initialCityValueElement.length && $initialCityValueElement.data('initial-city')) {
-        var initialCityNameFromDjango = $initialCityValueElement.data('initial-city');
-        console.log("Найдено начальное значение города из Django:", initialCityNameFromDjango);
-
-        var initialOption = new Option(initialCityNameFromDjango, initialCityNameFromDjango, true, true);
-
-        $citySelect.append(initialOption).trigger('change');
-
-        console.log("Город должен был быть установлен в Select2.");
-    } else {
-        console.log("Нет начального значения города для установки.");
-    }
-
+    // Выбранный город форма выводит единственным вариантом списка, остальные загружает автодополнение
 
     // Логика для очистки города при смене страны
     $countrySelect.on('change', function() {
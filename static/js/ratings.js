@@ -6,6 +6,8 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Находим все контейнеры с кнопками рейтинга
     const ratingButtonsContainers = document.querySelectorAll('.rating-buttons');
+    // Функции обновления состояния контейнеров по ID записи (для пакетной загрузки оценок)
+    const ratingUpdaters = new Map();
 
     ratingButtonsContainers.forEach(container => {
         const postId = container.dataset.postId; // ID поста
@@ -28,7 +30,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (likeButton) {
                 const currentVote = parseInt(likeButton.dataset.currentVote);
                 if (currentVote === 1) {
-                    likeButton.classList.add('active'); // Или 'btn-success'
+                    likeButton.classList.add('active', 'btn-success');
                     likeButton.classList.remove('btn-outline-success');
                 } else {
                     likeButton.classList.remove('active', 'btn-success');
@@ -38,7 +40,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (dislikeButton) {
                 const currentVote = parseInt(dislikeButton.dataset.currentVote);
                 if (currentVote === -1) {
-                    dislikeButton.classList.add('active'); // Или 'btn-danger'
+                    dislikeButton.classList.add('active', 'btn-danger');
                     dislikeButton.classList.remove('btn-outline-danger');
                 } else {
                     dislikeButton.classList.remove('active', 'btn-danger');
@@ -50,6 +52,14 @@ document.addEventListener('DOMContentLoaded', function() {
         // Вызываем инициализацию при загрузке
         initializeButtonsState();
 
+        ratingUpdaters.set(postId, rating => {
+            const currentVote = rating.user_vote === null ? '' : rating.user_vote;
+            if (likeButton) likeButton.dataset.currentVote = currentVote;
+            if (dislikeButton) dislikeButton.dataset.currentVote = currentVote;
+            if (ratingSumElement) ratingSumElement.textContent = rating.rating_sum;
+            initializeButtonsState();
+        });
+
         // --- Обработчик клика по кнопкам рейтинга ---
         function handleRatingClick(event) {
             // Если пользователь не аутентифицирован, выходим (кнопки уже должны быть disabled, но это дополнительная защита)
@@ -130,4 +140,21 @@ document.addEventListener('DOMContentLoaded', function() {
         if (likeButton) likeButton.addEventListener('click', handleRatingClick);
         if (dislikeButton) dislikeButton.addEventListener('click', handleRatingClick);
     });
-});
\ No newline at end of file
+
+    // --- Пакетная загрузка сумм и оценок пользователя одним запросом ---
+    // Нужна только странице из общего кэша (data-shared-page): в ней нет оценок пользователя,
+    // остальные страницы выводят их сразу
+    const isSharedPage = document.body.dataset.sharedPage === 'true';
+    if (isAuthenticated && isSharedPage && ratingUpdaters.size) {
+        const ids = Array.from(ratingUpdaters.keys()).join(',');
+        fetch(`/rating/batch/?ids=${ids}`, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(data => {
+                Object.entries(data.ratings).forEach(([postId, rating]) => {
+                    const update = ratingUpdaters.get(postId);
+                    if (update) update(rating);
+                });
+            })
+            .catch(error => console.error('Не удалось загрузить оценки:', error));
+    }
+});
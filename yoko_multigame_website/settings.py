@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
 import os
 import sys
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.log import DEFAULT_LOGGING
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,6 +57,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.services.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -61,7 +65,9 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.accounts.middleware.LastSeenMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.services.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'yoko_multigame_website.urls'
@@ -71,7 +77,7 @@ TEMPLATES = [
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
-        'APP_DIRS': True,
+        'APP_DIRS': DEBUG,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
@@ -84,6 +90,34 @@ TEMPLATES = [
     },
 ]
 
+# Без DEBUG загрузчики задаются явно: скомпилированные шаблоны кэшируются в памяти процесса.
+# В DEBUG остается поведение Django по умолчанию (APP_DIRS)
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Компиляция всех шаблонов при старте процесса (команда warmup_templates делает то же вручную)
+TEMPLATE_WARMUP = os.getenv("TEMPLATE_WARMUP", "False").lower() in ("true", "1", "yes")
+# Замер времени рендеринга шаблонов и предупреждение о рендеринге дольше TEMPLATE_SLOW_RENDER_MS
+TEMPLATE_RENDER_TIMING = os.getenv("TEMPLATE_RENDER_TIMING", "False").lower() in ("true", "1", "yes")
+TEMPLATE_SLOW_RENDER_MS = int(os.getenv("TEMPLATE_SLOW_RENDER_MS", 50))
+
+# Замер SQL-запросов, шаблонов и контекстных процессоров по представлениям (PerformanceMiddleware).
+# В продакшене достаточно измерять часть запросов: PERFORMANCE_SAMPLE_RATE от 0 до 1
+PERFORMANCE_MONITORING = os.getenv("PERFORMANCE_MONITORING", "False").lower() in ("true", "1", "yes")
+PERFORMANCE_SAMPLE_RATE = float(os.getenv("PERFORMANCE_SAMPLE_RATE", 1))
+PERFORMANCE_STATS_WINDOW = int(os.getenv("PERFORMANCE_STATS_WINDOW", 1000))
+# Заголовок Server-Timing раскрывает внутренние замеры каждому клиенту: включать только для отладки
+PERFORMANCE_SERVER_TIMING = os.getenv("PERFORMANCE_SERVER_TIMING", "False").lower() in ("true", "1", "yes")
+# Превышение бюджета времени в тестах производительности (assertMaxDuration) - ошибка, а не предупреждение.
+# Включать только на стабильном окружении: на общих CI-машинах время нестабильно
+PERFORMANCE_TEST_DURATION = os.getenv("PERFORMANCE_TEST_DURATION", "False").lower() in ("true", "1", "yes")
+
 WSGI_APPLICATION = 'yoko_multigame_website.wsgi.application'
 
 # Database
@@ -97,9 +131,54 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Время жизни постоянного соединения (секунды) и проверка его работоспособности перед использованием
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() in ("true", "1", "yes"),
     }
 }
 
+# Пул соединений psycopg 3 (только для PostgreSQL).
+# Пул несовместим с CONN_MAX_AGE, поэтому при его включении постоянные соединения отключаются,
+# а CONN_HEALTH_CHECKS включает проверку соединения при выдаче из пула.
+DB_POOL = os.getenv("DB_POOL", "False").lower() in ("true", "1", "yes")
+
+if DB_POOL and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 600)),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", 3600)),
+        },
+    }
+
+# Реплики для чтения: список через запятую. Каждая реплика наследует параметры default,
+# переопределяя HOST (PostgreSQL) или NAME (SQLite, для локальной проверки маршрутизации).
+DB_REPLICAS = [replica.strip() for replica in os.getenv("DB_REPLICAS", "").split(",") if replica.strip()]
+
+for replica_index, replica in enumerate(DB_REPLICAS, start=1):
+    replica_key = "NAME" if "sqlite3" in (DATABASES["default"]["ENGINE"] or "") else "HOST"
+    DATABASES[f"replica_{replica_index}"] = {
+        **DATABASES["default"],
+        replica_key: replica,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ['apps.services.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи запросы пользователя читают только с основной базы
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", 10))
+
+# Пользователь запроса загружается вместе с профилем. ModelBackend оставлен для сессий,
+# созданных до его подключения (Django проверяет, что бэкенд сессии есть в списке)
+AUTHENTICATION_BACKENDS = [
+    'apps.accounts.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,6 +223,42 @@ STATICFILES_DIRS = [
 
 ]
 
+# Сборка статики при collectstatic: бандлы JS, хэши содержимого в именах файлов и сжатые копии .gz/.br.
+# Собранные файлы можно кэшировать на год. Без сборки (разработка) скрипты подключаются по отдельности.
+STATIC_PIPELINE = os.getenv("STATIC_PIPELINE", "False").lower() in ("true", "1", "yes")
+STATIC_BUNDLES = {
+    'site': ('js/backend.js',),
+    'post_list': ('js/ratings.js',),
+    'post_detail': ('js/ratings.js', 'js/comments.js'),
+    'post_events': ('js/post_events.js',),
+    'profile_edit': ('js/profile_scripts.js',),
+}
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'apps.services.storage.PipelineStaticFilesStorage' if STATIC_PIPELINE
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Сторонние библиотеки с закрепленными версиями. При VENDOR_ASSETS_LOCAL подключаются локальные копии,
+# скачанные командой python manage.py vendor_assets, и собираются вместе со статикой проекта
+VENDOR_ASSETS_LOCAL = os.getenv("VENDOR_ASSETS_LOCAL", "False").lower() in ("true", "1", "yes")
+VENDOR_ASSETS = {
+    'jquery': 'https://code.jquery.com/jquery-3.7.1.min.js',
+    'flatpickr_css': 'https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/flatpickr.min.css',
+    'flatpickr_js': 'https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/flatpickr.min.js',
+    'flatpickr_ru': 'https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/l10n/ru.js',
+    'select2_css': 'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/css/select2.min.css',
+    'select2_bootstrap_css':
+        'https://cdn.jsdelivr.net/npm/select2-bootstrap-5-theme@1.3.0/dist/select2-bootstrap-5-theme.min.css',
+    'select2_js': 'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js',
+    'select2_ru': 'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/i18n/ru.js',
+}
+
 MEDIA_ROOT = (BASE_DIR / 'media')
 MEDIA_URL = '/media/'
 
@@ -154,8 +269,78 @@ CACHES = {
     }
 }
 
+# Хранение сессий: db - в базе данных, cached_db - в кэше с записью в базу (чтение без запроса к базе),
+# signed_cookies - в подписанной cookie без обращения к базе (данные видны клиенту, объем до 4 КБ).
+# Неизмененные сессии не перезаписываются, истекшие удаляет команда clear_expired_sessions
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "db")
+SESSION_ENGINES = {
+    'db': 'apps.services.sessions.db',
+    'cached_db': 'apps.services.sessions.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f'Неизвестное значение SESSION_BACKEND: {SESSION_BACKEND!r}. '
+        f'Допустимые значения: {", ".join(SESSION_ENGINES)}.'
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_CLEAR_BATCH_SIZE = int(os.getenv("SESSION_CLEAR_BATCH_SIZE", 1000))
+
+# Отметки активности пользователей пишутся в журнал в кэше не чаще раза в LAST_SEEN_INTERVAL секунд
+# и переносятся в базу командой flush_last_seen пачками по LAST_SEEN_BATCH_SIZE.
+# Время входа (last_login) пишется в базу при каждом входе
+LAST_SEEN_INTERVAL = int(os.getenv("LAST_SEEN_INTERVAL", 300))
+LAST_SEEN_BATCH_SIZE = int(os.getenv("LAST_SEEN_BATCH_SIZE", 500))
+LAST_SEEN_BUFFER_TIMEOUT = int(os.getenv("LAST_SEEN_BUFFER_TIMEOUT", 86400))
+# Кэш журнала активности. Нужен кэш с атомарным incr и без вытеснения (Redis, memcached):
+# FileBasedCache по умолчанию удаляет случайные записи при переполнении, и часть отметок теряется
+LAST_SEEN_CACHE = os.getenv("LAST_SEEN_CACHE", "default")
+
+# Время жизни кэша карточек авторов комментариев (секунды), сбрасываются при изменении профиля
+AUTHOR_CARD_CACHE_TIMEOUT = int(os.getenv("AUTHOR_CARD_CACHE_TIMEOUT", 86400))
+
+# Время жизни кэша статистики авторов на странице профиля (секунды), сбрасывается при изменении
+# записей, комментариев и оценок автора
+AUTHOR_STATS_CACHE_TIMEOUT = int(os.getenv("AUTHOR_STATS_CACHE_TIMEOUT", 3600))
+
+# Время жизни кэша списка категорий боковой панели (секунды), сбрасывается при изменении записей и категорий
+CATEGORY_LIST_CACHE_TIMEOUT = int(os.getenv("CATEGORY_LIST_CACHE_TIMEOUT", 3600))
+
+# Время жизни кэша автодополнения городов (секунды)
+CITY_AUTOCOMPLETE_CACHE_TIMEOUT = int(os.getenv("CITY_AUTOCOMPLETE_CACHE_TIMEOUT", 300))
+
+# Режим хранения комментариев: новые комментарии и ответы добавляются в конец дерева MPTT
+# без сдвига соседних веток, порядок "сначала новые" восстанавливается при выводе.
+# При переключении режима выполните python manage.py rebuild_comments
+COMMENTS_APPEND_ONLY = os.getenv("COMMENTS_APPEND_ONLY", "False").lower() in ("true", "1", "yes")
+
+# Обновления записей в реальном времени (server-sent events). Включать только при запуске под ASGI:
+# под WSGI поток буферизуется и занимает рабочий процесс на SSE_MAX_SECONDS, ничего не доставляя.
+# PUBSUB_BROKER - класс брокера с методами subscribe/publish, по умолчанию в памяти процесса
+SSE_ENABLED = os.getenv("SSE_ENABLED", "False").lower() in ("true", "1", "yes")
+PUBSUB_BROKER = os.getenv("PUBSUB_BROKER", "apps.services.pubsub.LocalBroker")
+SSE_KEEPALIVE_SECONDS = int(os.getenv("SSE_KEEPALIVE_SECONDS", 15))
+# Через сколько секунд сервер закрывает поток (браузер переподключается сам)
+SSE_MAX_SECONDS = int(os.getenv("SSE_MAX_SECONDS", 300))
+
+# Условный GET (ETag/Last-Modified) для ленты и страниц записей: 304 Not Modified без рендеринга
+CONDITIONAL_GET = os.getenv("CONDITIONAL_GET", "True").lower() in ("true", "1", "yes")
+# Общий кэш ленты и страниц записей для всех пользователей: персональные фрагменты заполняются
+# при каждом запросе, ключ включает версию данных условного GET (требует CONDITIONAL_GET)
+PAGE_CACHE = os.getenv("PAGE_CACHE", "False").lower() in ("true", "1", "yes")
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", 600))
+
 # Настройки почты
-EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+# Письма ставятся в очередь (OutboxEmail) и отправляются командой send_outbox через OUTBOX_EMAIL_BACKEND
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "apps.services.mail.OutboxEmailBackend")
+OUTBOX_EMAIL_BACKEND = os.getenv("OUTBOX_EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_RETRY_DELAY = int(os.getenv("OUTBOX_RETRY_DELAY", 60))
+OUTBOX_MAX_RETRY_DELAY = int(os.getenv("OUTBOX_MAX_RETRY_DELAY", 3600))
+# Через сколько секунд письмо, взятое на отправку и не отмеченное (воркер остановлен), снова попадает в очередь
+OUTBOX_CLAIM_TIMEOUT = int(os.getenv("OUTBOX_CLAIM_TIMEOUT", 600))
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", BASE_DIR / 'sent_emails')
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
@@ -164,6 +349,11 @@ EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() in ("true", "1", "yes
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 
+# Письма об ошибках администраторам отправляются сразу через OUTBOX_EMAIL_BACKEND, минуя очередь:
+# ошибка может быть вызвана недоступностью базы, где хранится очередь
+LOGGING = copy.deepcopy(DEFAULT_LOGGING)
+LOGGING['handlers']['mail_admins']['email_backend'] = OUTBOX_EMAIL_BACKEND
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
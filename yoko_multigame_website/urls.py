@@ -27,6 +27,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('apps.blog.urls', namespace='blog')),
     path('accounts/', include('apps.accounts.urls', namespace='accounts')),
+    path('services/', include('apps.services.urls', namespace='services')),
 ]
 
 if settings.DEBUG: